@@ -1,26 +1,30 @@
 """API related functions."""
 
+from functools import cache
+from hashlib import sha256
 from io import BytesIO
 import os
 import pandas as pd
 from PIL import Image
 import requests
-from typing import TYPE_CHECKING
+from requests.adapters import HTTPAdapter
+from typing import TYPE_CHECKING, Callable, Hashable, Iterator, Optional
+from urllib3.util.retry import Retry
 
 from dbdie_classes.options.FMT import to_fmt
-from dbdie_classes.options.MODEL_TYPE import CHARACTER, ITEM, TO_ID_NAMES, WITH_TYPES
+from dbdie_classes.options.MODEL_TYPE import ITEM, WITH_TYPES
 
-from code.api import extract_player_info
-from paths import get_predictable_csv_path, load_predictable_csv, load_types_csv
+from paths import get_predictable_csv_path
 
 if TYPE_CHECKING:
     from PIL import ImageFile
 
     from dbdie_classes.base import (
-        Endpoint, FullEndpoint, IsForKiller, LabelId, ModelType, Path
+        Endpoint, FullEndpoint, IsForKiller, MatchId, ModelType, Path
     )
 
-    from classes.labeler import Labeler
+    from classes.cache_manifest import CacheManifest
+    from classes.label_upload import LabelUpload
 
 
 def endp(endpoint: "Endpoint") -> "FullEndpoint":
@@ -28,6 +32,48 @@ def endp(endpoint: "Endpoint") -> "FullEndpoint":
     return f"{os.environ['FASTAPI_HOST']}/{endpoint}"
 
 
+# * Shared HTTP client
+
+
+def get_timeout() -> tuple[float, float]:
+    """Get (connect, read) timeouts in seconds for the API requests."""
+    return (
+        float(os.environ.get("FASTAPI_CONNECT_TIMEOUT", 3.05)),
+        float(os.environ.get("FASTAPI_READ_TIMEOUT", 30.0)),
+    )
+
+
+@cache
+def get_session() -> requests.Session:
+    """Get the process-wide HTTP session.
+    Pools keep-alive connections to the API and retries transient failures
+    of idempotent requests with exponential backoff.
+    """
+    retry = Retry(
+        total=int(os.environ.get("FASTAPI_RETRIES", 3)),
+        backoff_factor=float(os.environ.get("FASTAPI_BACKOFF", 0.3)),
+        status_forcelist=[502, 503, 504],
+        raise_on_status=False,  # let parse_or_raise handle the last response
+    )
+    pool_size = int(os.environ.get("FASTAPI_POOL_SIZE", 10))
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=retry,
+    )
+
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def request(method: str, endpoint: "Endpoint", **kwargs) -> requests.Response:
+    """Send a request to the API through the shared session."""
+    kwargs.setdefault("timeout", get_timeout())
+    return get_session().request(method, endp(endpoint), **kwargs)
+
+
 def parse_or_raise(resp, exp_status_code: int = 200):
     """Parse Response as JSON or raise error as exception, depending on status code."""
     if resp.status_code != exp_status_code:
@@ -35,7 +81,7 @@ def parse_or_raise(resp, exp_status_code: int = 200):
             msg = resp.json()
         except requests.exceptions.JSONDecodeError:
             msg = resp.reason
-            raise Exception(msg)
+        raise Exception(msg)
     return resp.json()
 
 
@@ -45,14 +91,14 @@ def parse_or_raise(resp, exp_status_code: int = 200):
 def getr(endpoint: "Endpoint", **kwargs):
     """Include the boilerplate for a GET request."""
     return parse_or_raise(
-        requests.get(endp(endpoint), **kwargs)
+        request("GET", endpoint, **kwargs)
     )
 
 
 def postr(endpoint: "Endpoint", **kwargs):
     """Include the boilerplate for a POST request."""
     return parse_or_raise(
-        requests.post(endp(endpoint), **kwargs),
+        request("POST", endpoint, **kwargs),
         exp_status_code=201,  # HTTP_201_CREATED
     )
 
@@ -60,129 +106,180 @@ def postr(endpoint: "Endpoint", **kwargs):
 def putr(endpoint: "Endpoint", **kwargs):
     """Include the boilerplate for a PUT request."""
     return parse_or_raise(
-        requests.put(endp(endpoint), **kwargs)
+        request("PUT", endpoint, **kwargs)
     )
 
 
-# * Other functions
+def paginate(
+    send: Callable,
+    endpoint: "Endpoint",
+    page_size: int,
+    key: Callable[[dict], Hashable],
+    order_by: str,
+    params: Optional[dict] = None,
+    **kwargs,
+) -> Iterator[list[dict]]:
+    """Iterate over the non-empty pages of a paginated endpoint, sorted by 'order_by'.
+    'send' is the simpler HTTP request function to use (e.g. getr or postr).
+    Records already fetched, as identified by 'key', are dropped from the later pages,
+    since rows modified while paging can shift between pages. Paging stops when
+    a page brings no new records, e.g. if the server ignores 'skip'.
+    """
+    assert page_size > 0
+    params = {} if params is None else params
+
+    seen: set = set()
+    skip = 0
+    while True:
+        page = send(
+            endpoint,
+            params=params | {"skip": skip, "limit": page_size, "order_by": order_by},
+            **kwargs,
+        )
+        new = [r for r in page if key(r) not in seen]
+        if not new:
+            return
+        seen.update(key(r) for r in new)
+        yield new
 
+        if len(page) < page_size:
+            return
+        skip += len(page)
 
-def cache_from_endpoint(endpoint: "Endpoint") -> None:
-    items = requests.get(endp(endpoint))
-    assert items.status_code == 200
-    df = pd.DataFrame(items.json())
-    df.to_csv(get_predictable_csv_path(endpoint, is_type=False), index=False)
 
+# * Other functions
 
-def get_items(
-    mt: "ModelType",
-    ifk: bool,
+
+def fetch_cached(
+    endpoint: "Endpoint",
+    path: "Path",
+    manifest: "CacheManifest",
     local_fallback: bool,
-    is_type: bool,
-    clean_f,
-) -> tuple[list, "Path"]:
+    **kwargs,
+) -> Optional[requests.Response]:
+    """Fetch an endpoint whose response is cached in 'path'.
+    Returns None if the cached file is still valid and should be kept, that is,
+    if it's fresh, if the API confirms it hasn't changed, or if the API failed
+    and 'local_fallback' allows using the cached file instead.
+    """
+    if manifest.is_fresh(path):
+        return None
+
     try:
-        if is_type:
-            items = requests.get(endp(f"/{mt}/types"))
-        else:
-            items = requests.get(
-                endp(f"/{mt}"),
-                params={"ifk": ifk, "limit": 10_000},
-            )
-
-        if items.status_code != 200:
-            raise AssertionError(items.reason)
-    except Exception as e:
-        print("[WARNING] Problem with the API.")
-        if not local_fallback:
-            # TODO: For now we don't allow fallback
-            raise Exception(items.reason) from e
-        else:
-            try:
-                print("Trying with local data...")
-                df, path = (
-                    load_types_csv(mt)
-                    if is_type
-                    else load_predictable_csv(to_fmt(mt, ifk))
-                )
-                print("Local data loaded successfully.")
-                return df, path
-            except Exception as e:
-                print("[ERROR] Local data not found.")
-                raise Exception(items.reason) from e
-
-    items_json = items.json()
-    items = clean_f(items_json)
-    path = (
-        get_predictable_csv_path(mt, is_type=True)
-        if is_type
-        else get_predictable_csv_path(to_fmt(mt, ifk), is_type=False)
+        resp = request(
+            "GET",
+            endpoint,
+            headers=manifest.conditional_headers(path),
+            **kwargs,
+        )
+        if resp.status_code == 304:  # HTTP_304_NOT_MODIFIED
+            manifest.touch(path)
+            return None
+        elif resp.status_code != 200:
+            raise AssertionError(resp.reason)
+    except Exception:
+        print(f"[WARNING] Problem with the API ({endpoint}).")
+        if not (local_fallback and (manifest.get(path) is not None)):
+            raise
+        print(f"Using local data ({path}).")
+        return None
+
+    entry = manifest.get(path)
+    if (entry is not None) and (entry.sha256 == sha256(resp.content).hexdigest()):
+        manifest.touch(path)
+        return None
+
+    return resp
+
+
+def save_cached(
+    df: pd.DataFrame,
+    path: "Path",
+    resp: requests.Response,
+    manifest: "CacheManifest",
+) -> None:
+    """Save fetched DataFrame as CSV and record it in the manifest."""
+    df.to_csv(path, index=False)
+    manifest.record(
+        path,
+        rows=len(df.index),
+        sha256=sha256(resp.content).hexdigest(),
+        etag=resp.headers.get("ETag"),
     )
 
-    return items, path
+
+def cache_from_endpoint(
+    endpoint: "Endpoint",
+    manifest: "CacheManifest",
+    local_fallback: bool,
+) -> None:
+    path = get_predictable_csv_path(endpoint, is_type=False)
+    resp = fetch_cached(endpoint, path, manifest, local_fallback)
+    if resp is not None:
+        save_cached(pd.DataFrame(resp.json()), path, resp, manifest)
 
 
 def cache_function(
     mt: "ModelType",
     ifk: "IsForKiller",
     clean_f,
+    manifest: "CacheManifest",
     local_fallback: bool,
+    types: bool = True,
 ) -> None:
-    """Get predictables from the API and cache."""
-    items, path = get_items(
-        mt,
-        ifk,
+    """Get predictables from the API and cache.
+    If 'types' is True, the model type's item types are cached as well.
+    """
+    path = get_predictable_csv_path(to_fmt(mt, ifk), is_type=False)
+    resp = fetch_cached(
+        f"/{mt}",
+        path,
+        manifest,
         local_fallback,
-        is_type=False,
-        clean_f=clean_f,
+        params={"ifk": ifk, "limit": 10_000},
     )
-    if mt == ITEM:
-        items = items[~(items["type_id"] == 7)]
-    items.to_csv(path, index=False)
-
-    if mt in WITH_TYPES:
-        item_types, path_types = get_items(
-            mt,
-            ifk,
-            local_fallback,
-            is_type=True,
-            clean_f=clean_f,
-        )
-        item_types.to_csv(path_types, index=False)
-
+    if resp is not None:
+        items = clean_f(resp.json())
+        if mt == ITEM:
+            items = items[~(items["type_id"] == 7)]
+        save_cached(items, path, resp, manifest)
 
-def upload_labels(labeler: "Labeler", labels: list["LabelId"]) -> None:
-    """Upload labels set by the user."""
-    if labeler.current["label_id"].to_list() != labels:
-        labeler.update_current(labels)
-        print("Labels uploaded.")
+    if types and (mt in WITH_TYPES):
+        cache_types(mt, clean_f, manifest, local_fallback)
 
-    labels_wrapped = labeler.wrap(labels)
 
-    for player_ix in range(labeler.n_players):
-        match_id, player_id, player_labels = extract_player_info(
-            labeler,
-            labels_wrapped,
-            player_ix,
-        )
+def cache_types(
+    mt: "ModelType",
+    clean_f,
+    manifest: "CacheManifest",
+    local_fallback: bool,
+) -> None:
+    """Get predictables' item types from the API and cache."""
+    path = get_predictable_csv_path(mt, is_type=True)
+    resp = fetch_cached(f"/{mt}/types", path, manifest, local_fallback)
+    if resp is not None:
+        save_cached(clean_f(resp.json()), path, resp, manifest)
 
-        resp = requests.put(
-            endp("/labels/predictable"),
-            params={"match_id": match_id, "strict": True},
-            json={
-                "id": player_id,
-                TO_ID_NAMES[labeler.mt]: player_labels,
-            },
-        )
 
-        if resp.status_code != 200:
-            try:
-                msg = resp.json()
-            except requests.exceptions.JSONDecodeError:
-                msg = resp.reason
-            raise Exception(msg)
+def put_label(upload: "LabelUpload") -> None:
+    """Upload the labels of a single player."""
+    putr("/labels/predictable", params=upload.params, json=upload.json)
 
 
 def from_resp_to_image(resp: requests.models.Response) -> "ImageFile":
     """Convert from response to PIL Image."""
     return Image.open(BytesIO(resp.content))
+
+
+def fetch_match_image(match_id: "MatchId", etag: Optional[str] = None) -> requests.Response:
+    """Request the full image of a match, conditionally if its ETag is known."""
+    return request(
+        "GET",
+        f"/matches/image/{match_id}",
+        headers={"If-None-Match": etag} if etag is not None else {},
+    )
+
+
+def get_match_image(match_id: "MatchId") -> "ImageFile":
+    """Get the full image of a match from the API."""
+    return from_resp_to_image(fetch_match_image(match_id))
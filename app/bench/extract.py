@@ -0,0 +1,75 @@
+"""Benchmark of the labels' JSON normalisation of the extract phase.
+
+Compares 'process_labels' against the previous row-wise implementation:
+    PYTHONPATH=app python3 -m bench.extract --n-matches 10000
+"""
+
+from argparse import ArgumentParser
+import pandas as pd
+
+from dbdie_classes.options.MODEL_TYPE import TO_ID_NAMES as MT_TO_ID_NAMES
+from dbdie_classes.options.SQL_COLS import MANUALLY_CHECKED_COLS
+
+from bench.synthetic import make_synthetic_data
+from bench.timing import summarize, time_calls
+from data.extract import process_labels
+
+
+def process_labels_rowwise(labels_json: list[dict]) -> pd.DataFrame:
+    """Previous implementation of 'process_labels', with row-wise maps."""
+    labels = pd.DataFrame(
+        [
+            {k: v for k, v in lbl.items() if k in ["match_id", "player", "manual_checks"]}
+            for lbl in labels_json
+        ]
+    )
+    assert not labels.empty
+
+    labels["manual_checks"] = labels["manual_checks"].map(lambda v: v["predictables"])
+    for c in MANUALLY_CHECKED_COLS:
+        labels[c] = labels["manual_checks"].map(lambda v: v[c[:-5]])
+    labels = labels.drop("manual_checks", axis=1)
+
+    labels[MANUALLY_CHECKED_COLS] = labels[MANUALLY_CHECKED_COLS].fillna(False)
+
+    labels["player_id"] = labels["player"].map(lambda pl: pl["id"])
+    for mt, id_name in MT_TO_ID_NAMES.items():
+        labels[mt] = labels["player"].map(lambda pl: pl[id_name])
+    labels = labels.drop("player", axis=1)
+
+    for i in range(4):
+        labels[f"perks_{i}"] = labels["perks"].map(lambda ps: ps[i] if ps is not None else None)
+    labels = labels.drop("perks", axis=1)
+
+    for i in range(2):
+        labels[f"addons_{i}"] = labels["addons"].map(lambda ps: ps[i] if ps is not None else None)
+    labels = labels.drop("addons", axis=1)
+
+    labels = labels.sort_values(["match_id", "player_id"])
+    labels = labels.set_index(["match_id", "player_id"], drop=True)
+
+    return labels
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Benchmark the labels' JSON normalisation.")
+    parser.add_argument("--n-matches", type=int, default=10_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    labels_json = make_synthetic_data(args.n_matches).labels
+    print(f"{len(labels_json)} labels")
+
+    pd.testing.assert_frame_equal(
+        process_labels(labels_json),
+        process_labels_rowwise(labels_json),
+        check_dtype=False,
+    )
+
+    for name, f in [("row-wise", process_labels_rowwise), ("columnar", process_labels)]:
+        lat, wall = time_calls(lambda: f(labels_json), args.repeats)
+        print(summarize(f"process_labels ({name})", lat, wall))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Microbenchmark of the Labeler's per-step kernels.
+
+Times the current window construction ('update_current') against the previous
+row-wise implementation, step by step over synthetic data:
+    PYTHONPATH=app python3 -m bench.labeler --n-matches 5000
+"""
+
+from argparse import ArgumentParser
+from dbdie_classes.options.FMT import to_fmt
+from dbdie_classes.options.MODEL_TYPE import ALL_MULTIPLE_CHOICE as ALL_MT_MULT
+import numpy as np
+import pandas as pd
+
+from bench.synthetic import make_synthetic_data
+from bench.timing import summarize, time_calls
+from classes.label_index import LabelIndex
+from classes.labeler import Labeler
+from code.labeler import update_current
+from data.extract import process_labels, process_matches
+from data.store import enforce_dtypes
+
+
+def update_current_rowwise(lbl) -> pd.DataFrame:
+    """Previous implementation of 'update_current', with iterrows and list sums,
+    as a DataFrame and always updating the matches' info.
+    """
+    ptrs = lbl.pending[lbl.counts.ptr_min:lbl.counts.ptr_max]
+    c_labels: pd.DataFrame = lbl.labels.iloc[ptrs, lbl.column_ixs]
+
+    labels = sum(([row[c] for c in lbl.columns] for _, row in c_labels.iterrows()), [])
+    players = sum(
+        ([pl_id for _ in lbl.columns] for pl_id in c_labels.index.get_level_values(1).values),
+        [],
+    )
+
+    m_cols = ["filename", "match_date", "dbdv_id"]
+    match_ids = sum(
+        ([mid for _ in lbl.columns] for mid in c_labels.index.get_level_values(0).values),
+        [],
+    )
+    c_matches = lbl.matches[m_cols].loc[match_ids].reset_index(drop=False)
+    c_matches = c_matches.rename({c: f"m_{c}" for c in ["id"] + m_cols}, axis=1)
+
+    return pd.concat(
+        (
+            c_matches,
+            pd.Series(labels, name="label_id").fillna(lbl.null_id).astype(int),
+            pd.Series(players, name="player_id"),
+            pd.Series(lbl.item_ids, name="item_id"),
+        ),
+        axis=1,
+    )
+
+
+def bench_labeler(lbl: Labeler, steps: int) -> None:
+    lat_next, lat_new, lat_old = [], [], []
+    for _ in range(steps):
+        if lbl.counts.ptr_max + lbl.n_players > lbl.pending.size:
+            break
+        lat_next.extend(time_calls(lbl.next, 1)[0])
+
+        new = update_current(lbl, update_match=True)
+        old = update_current_rowwise(lbl)
+        for c in ["m_id", "label_id", "player_id", "item_id"]:
+            assert np.array_equal(getattr(new, c), old[c].values), c
+
+        lat_new.extend(time_calls(lambda: update_current(lbl, True), 1)[0])
+        lat_old.extend(time_calls(lambda: update_current_rowwise(lbl), 1)[0])
+
+    wall = sum(lat_next)
+    print(summarize(f"{lbl.fmt} next()", lat_next, wall))
+    print(summarize(f"{lbl.fmt} kernel (row-wise)", lat_old, sum(lat_old)))
+    print(summarize(f"{lbl.fmt} kernel (vectorized)", lat_new, sum(lat_new)))
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Benchmark the Labeler's per-step kernels.")
+    parser.add_argument("--n-matches", type=int, default=5_000)
+    parser.add_argument("--steps", type=int, default=200)
+    args = parser.parse_args()
+
+    data = make_synthetic_data(args.n_matches)
+    matches = enforce_dtypes(process_matches(data.matches), "matches")
+    label_index = LabelIndex(enforce_dtypes(process_labels(data.labels), "labels"))
+
+    for mt in ALL_MT_MULT:
+        for ifk in [False, True]:
+            bench_labeler(Labeler(matches, label_index, fmt=to_fmt(mt, ifk)), args.steps)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Load-test harness of the DBDIE UI API client against the stand-in API.
+
+Runs from the repo root, without a live API nor touching the local cache:
+    PYTHONPATH=app python3 -m bench.load_test --latency-ms 10
+"""
+
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+import os
+from tempfile import mkdtemp
+from time import perf_counter
+from types import SimpleNamespace
+
+from dbdie_classes.options.FMT import to_fmt
+from dbdie_classes.options.MODEL_TYPE import ALL_MULTIPLE_CHOICE as ALL_MT_MULT
+from PIL import Image
+
+# The cache must be redirected before the 'paths' module is imported
+TMP_FD = mkdtemp(prefix="dbdie_ui_bench_")
+os.environ["DBDIE_UI_CACHE_RP"] = f"{TMP_FD}/cache"
+
+from api import get_match_image, getr  # noqa: E402
+from bench.server import StandInServer  # noqa: E402
+from bench.synthetic import make_synthetic_data  # noqa: E402
+from bench.timing import summarize, time_calls  # noqa: E402
+from classes.crop_index import CropIndex  # noqa: E402
+from classes.image_prefetcher import ImagePrefetcher  # noqa: E402
+from classes.label_index import LabelIndex  # noqa: E402
+from classes.labeler import Labeler  # noqa: E402
+from classes.labeler_selector import LabelerSelector  # noqa: E402
+from classes.session_registry import SessionRegistry  # noqa: E402
+from classes.upload_queue import UploadQueue  # noqa: E402
+from components.quick_labeling import make_label_fn  # noqa: E402
+from data.load import load_from_files  # noqa: E402
+from data.warm_up import warm_up_cache  # noqa: E402
+from paths import IMG_REF_RP, PREDICTABLES_RP  # noqa: E402
+
+FMT_DROPDOWNS = ["💠 Perks", "😎 Survivor"]  # UI's initial dropdown values
+
+
+def make_crops(labelers: dict[str, Labeler]) -> None:
+    """Point each labeler to a folder of placeholder crops for all its matches."""
+    placeholder = f"{TMP_FD}/placeholder.jpg"
+    Image.new("RGB", (128, 128), (90, 90, 90)).save(placeholder)
+
+    for fmt, lbl in labelers.items():
+        lbl.crops = CropIndex(f"{TMP_FD}/crops/{fmt}")
+        os.makedirs(lbl.folder_path)
+        for filename in lbl.matches["filename"].values:
+            for pl in range(5):
+                for it in range(lbl.n_items):
+                    os.link(placeholder, f"{lbl.folder_path}/{filename[:-4]}_{pl}_{it}.jpg")
+
+
+# * Benchmarks
+
+
+def bench_requests(n: int, concurrency: int) -> None:
+    lat, wall = time_calls(lambda: getr("/rarity"), n)
+    print(summarize("GET /rarity (sequential)", lat, wall))
+
+    start = perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        lat = list(
+            executor.map(lambda _: time_calls(lambda: getr("/rarity"), 1)[0][0], range(n))
+        )
+    print(summarize(f"GET /rarity (x{concurrency} threads)", lat, perf_counter() - start))
+
+
+def bench_warm_up() -> None:
+    for name in ["cold", "warm"]:
+        start = perf_counter()
+        warm_up_cache(local_fallback=False)
+        print(f"Warm-up ({name}): {perf_counter() - start:.2f}s")
+
+
+def bench_match_images(n: int) -> None:
+    ids = iter(range(1, n + 1))
+    lat, wall = time_calls(lambda: get_match_image(next(ids)).load(), n)
+    print(summarize("GET /matches/image/{id}", lat, wall))
+
+
+def bench_clicks(n: int) -> None:
+    matches, labels = load_from_files()
+    label_index = LabelIndex(labels)
+    labelers = {
+        to_fmt(mt, ifk): Labeler(matches, label_index, fmt=to_fmt(mt, ifk))
+        for mt in ALL_MT_MULT
+        for ifk in [False, True]
+    }
+    make_crops(labelers)
+
+    labeler_sel = LabelerSelector(labelers)
+    sessions = SessionRegistry(lambda _: labeler_sel)
+    upload_queue = UploadQueue()
+    img_prefetcher = ImagePrefetcher()
+    label_fn = make_label_fn(sessions, upload_queue, img_prefetcher, upload=True)
+    request = SimpleNamespace(session_hash="load-test")
+
+    def click() -> None:
+        label_fn(request, *(labeler_sel.labeler.current.labels + FMT_DROPDOWNS))
+
+    lat = []
+    start = perf_counter()
+    for _ in range(n):
+        if labeler_sel.labeler.done:
+            break
+        lat.extend(time_calls(click, 1)[0])
+    print(summarize("label_fn click (upload)", lat, perf_counter() - start))
+
+    start = perf_counter()
+    upload_queue.join()
+    print(f"Upload queue flush after clicks: {perf_counter() - start:.2f}s")
+    for msg in upload_queue.pop_errors():
+        print(f"[ERROR] {msg}")
+
+
+# * Main function
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Load-test the API client against the stand-in API.")
+    parser.add_argument("--n-matches", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--images", type=int, default=20)
+    parser.add_argument("--clicks", type=int, default=30)
+    args = parser.parse_args()
+
+    os.makedirs(PREDICTABLES_RP)
+    os.makedirs(IMG_REF_RP)
+
+    server = StandInServer(
+        ("127.0.0.1", 0),
+        make_synthetic_data(args.n_matches),
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+    )
+    server.start_in_thread()
+    os.environ["FASTAPI_HOST"] = server.url
+    print(f"Stand-in API on {server.url}, working folder {TMP_FD}")
+
+    try:
+        bench_requests(args.requests, args.concurrency)
+        bench_warm_up()
+        bench_match_images(min(args.images, args.n_matches))
+        bench_clicks(args.clicks)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""Stand-in DBDIE API server with synthetic data and configurable latency.
+
+Implements the endpoints used by the UI, so that the API client can be
+exercised and benchmarked offline:
+    python3 -m bench.server --port 8000 --latency-ms 20
+"""
+
+from argparse import ArgumentParser
+from dbdie_classes.options.MODEL_TYPE import TO_ID_NAMES
+from functools import cache
+from hashlib import sha256
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+import json
+from random import uniform
+import re
+from threading import Lock, Thread
+from time import sleep
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+from PIL import Image
+
+from bench.synthetic import make_synthetic_data, now_iso, SyntheticData
+
+MATCH_IMAGE_RE = re.compile(r"^/matches/image/(\d+)$")
+TYPES_RE = re.compile(r"^/(\w+)/types$")
+PREDICTABLES_RE = re.compile(r"^/(\w+)$")
+
+
+def parse_bool(value: Optional[str]) -> Optional[bool]:
+    return None if value is None else value.lower() == "true"
+
+
+def sort_value(row: dict, field: str):
+    """Value of a row's field to sort by. Labels' player ids are nested in their player."""
+    return row["player"]["id"] if field == "player_id" else row[field]
+
+
+@cache
+def match_image(match_id: int, w: int = 1280, h: int = 720) -> bytes:
+    """Synthetic JPEG of a match."""
+    color = ((37 * match_id) % 256, (71 * match_id) % 256, (113 * match_id) % 256)
+    buffer = BytesIO()
+    Image.new("RGB", (w, h), color).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Request handler of the stand-in DBDIE API."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive
+    server: "StandInServer"
+
+    # * Responses
+
+    def send_body(self, status: int, body: bytes, content_type: str) -> None:
+        etag = f'"{sha256(body).hexdigest()[:32]}"'
+        if (status == 200) and (self.headers.get("If-None-Match") == etag):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if status == 200:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, data, status: int = 200) -> None:
+        self.send_body(status, json.dumps(data).encode(), "application/json")
+
+    def send_not_found(self) -> None:
+        self.send_json({"detail": "Not Found"}, status=404)
+
+    # * Request parsing
+
+    def parse(self) -> tuple[str, dict[str, str]]:
+        # The client joins the host and the endpoint with a slash, so paths start with '//',
+        # which urlparse would take as the start of a netloc
+        url = urlparse("/" + self.path.lstrip("/"))
+        params = {k: vs[-1] for k, vs in parse_qs(url.query).items()}
+        return url.path, params
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length)) if length else None
+
+    def page(self, rows: list, params: dict[str, str]) -> list:
+        if "order_by" in params:
+            fields = params["order_by"].split(",")
+            rows = sorted(rows, key=lambda r: tuple(sort_value(r, f) for f in fields))
+        skip = int(params.get("skip", 0))
+        limit = int(params.get("limit", 100))
+        return rows[skip:skip + limit]
+
+    # * Methods
+
+    def do_GET(self) -> None:
+        self.server.simulate_latency()
+        path, params = self.parse()
+        data = self.server.data
+
+        if path == "/matches":
+            rows = data.modified_since("matches", params.get("modified_since"))
+            self.send_json(self.page(rows, params))
+        elif path == "/matches/ids":
+            self.send_json([m["id"] for m in data.matches])
+        elif path == "/labels/ids":
+            self.send_json([[lbl["match_id"], lbl["player"]["id"]] for lbl in data.labels])
+        elif m := MATCH_IMAGE_RE.match(path):
+            self.send_body(200, match_image(int(m.group(1))), "image/jpeg")
+        elif path == "/rarity":
+            self.send_json(data.rarity)
+        elif (m := TYPES_RE.match(path)) and (m.group(1) in data.types):
+            self.send_json(data.types[m.group(1)])
+        elif (m := PREDICTABLES_RE.match(path)) and (m.group(1) in data.predictables):
+            rows = data.get_predictables(m.group(1), parse_bool(params.get("ifk")))
+            self.send_json(self.page(rows, params))
+        else:
+            self.send_not_found()
+
+    def do_POST(self) -> None:
+        self.server.simulate_latency()
+        path, params = self.parse()
+
+        if path == "/labels/filter-many":
+            self.read_json()  # filters aren't implemented
+            with self.server.lock:
+                rows = self.server.data.modified_since("labels", params.get("modified_since"))
+                self.send_json(self.page(rows, params), status=201)
+        else:
+            self.send_not_found()
+
+    def do_PUT(self) -> None:
+        self.server.simulate_latency()
+        path, params = self.parse()
+
+        if path == "/labels/predictable":
+            label = self.server.update_label(int(params["match_id"]), self.read_json())
+            if label is None:
+                self.send_not_found()
+            else:
+                self.send_json(label)
+        else:
+            self.send_not_found()
+
+    def log_message(self, format, *args) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class StandInServer(ThreadingHTTPServer):
+    """Threaded stand-in DBDIE API server."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        data: SyntheticData,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        verbose: bool = False,
+    ) -> None:
+        super().__init__(address, StandInHandler)
+        self.data = data
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.verbose = verbose
+        self.lock = Lock()
+        self.id_name_to_mt = {id_name: mt for mt, id_name in TO_ID_NAMES.items()}
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def simulate_latency(self) -> None:
+        delay_ms = self.latency_ms + uniform(0.0, self.jitter_ms)
+        if delay_ms > 0:
+            sleep(delay_ms / 1000)
+
+    def update_label(self, match_id: int, body: dict) -> Optional[dict]:
+        """Update the labels of a player, marking them as manually checked."""
+        with self.lock:
+            ix = self.data.label_ixs.get((match_id, body["id"]))
+            if ix is None:
+                return None
+
+            label = self.data.labels[ix]
+            label["date_modified"] = now_iso()
+            for id_name, value in body.items():
+                if id_name == "id":
+                    continue
+                label["player"][id_name] = value
+                label["manual_checks"]["predictables"][self.id_name_to_mt[id_name]] = True
+            return label
+
+    def start_in_thread(self) -> Thread:
+        """Serve in a daemon thread."""
+        thread = Thread(target=self.serve_forever, name="stand-in-api", daemon=True)
+        thread.start()
+        return thread
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Stand-in DBDIE API server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--n-matches", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    server = StandInServer(
+        (args.host, args.port),
+        make_synthetic_data(args.n_matches, seed=args.seed),
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        verbose=args.verbose,
+    )
+    print(f"Stand-in DBDIE API on {server.url} (FASTAPI_HOST)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
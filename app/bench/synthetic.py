@@ -0,0 +1,248 @@
+"""Synthetic DBDIE data for the stand-in API."""
+
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from dbdie_classes.options import MODEL_TYPE as MT
+from dbdie_classes.options import PLAYER_TYPE as PT
+from dbdie_classes.options.MODEL_TYPE import ALL_MULTIPLE_CHOICE as ALL_MT_MULT
+from dbdie_classes.options.MODEL_TYPE import TO_ID_NAMES
+from dbdie_classes.options.NULL_IDS import BY_MT as NULL_IDS_BY_MT
+from dbdie_classes.options.NULL_IDS import INT_IDS as NULL_INT_IDS
+from dbdie_classes.options.SQL_COLS import MANUALLY_CHECKED_COLS, MT_TO_COLS
+from random import Random
+from typing import Optional
+
+from configs.dropdown import MOST_USED
+
+EMOJIS = ["🔦", "🧰", "🩹", "🗝️", "🗺️", "🌿", "🦴", "🔥", "💀", "🌙"]
+RARITIES = [(1, "Common", "🟫"), (2, "Uncommon", "🟨"), (3, "Rare", "🟩"),
+            (4, "Very Rare", "🟪"), (5, "Ultra Rare", "🟥")]
+N_TYPES = 14
+KILLER_TYPE_IDS = range(10, N_TYPES)  # types 0-9 are for survivors
+EXCLUDED_ITEM_TYPE_ID = 7  # the UI drops items of this type
+N_PLAYERS = 5
+KILLER_PLAYER_ID = 4
+
+N_PREDICTABLES = {
+    MT.CHARACTER: 60,
+    MT.PERKS: 200,
+    MT.ITEM: 60,
+    MT.ADDONS: 160,
+    MT.OFFERING: 60,
+}
+
+
+@dataclass
+class SyntheticData:
+    """Synthetic tables of the DBDIE API, as JSON-like records."""
+
+    rarity       : list[dict]
+    predictables : dict[str, list[dict]]
+    types        : dict[str, list[dict]]
+    matches      : list[dict]
+    labels       : list[dict]
+    label_ixs    : dict[tuple[int, int], int] = field(init=False)
+
+    def __post_init__(self):
+        self.label_ixs = {
+            (lbl["match_id"], lbl["player"]["id"]): i
+            for i, lbl in enumerate(self.labels)
+        }
+
+    def modified_since(self, table: str, date: Optional[str]) -> list[dict]:
+        """Rows of the matches or labels table, filtered as the API's 'modified_since' does."""
+        rows = getattr(self, table)
+        return rows if date is None else [r for r in rows if r["date_modified"] >= date]
+
+    def get_predictables(self, mt: str, ifk: Optional[bool]) -> list[dict]:
+        """Predictables of the model type, filtered as the API's 'ifk' parameter does."""
+        return [
+            p for p in self.predictables[mt]
+            if (ifk is None) or (p["ifk"] is None) or (p["ifk"] == ifk)
+        ]
+
+
+# * Predictables
+
+
+def make_types(mt: str) -> list[dict]:
+    return [
+        {
+            "id": i,
+            "name": f"{mt.capitalize()} type {i}",
+            "emoji": EMOJIS[i % len(EMOJIS)],
+            "ifk": None if mt == MT.OFFERING else (i in KILLER_TYPE_IDS),
+        }
+        for i in range(N_TYPES)
+    ]
+
+
+def make_null_rows(mt: str) -> list[dict]:
+    null_names = NULL_IDS_BY_MT[mt]
+    return [
+        {
+            "id": int(null_id),
+            "name": name,
+            "ifk": (bool(k) if len(null_names) == 2 else None),
+        }
+        for k, (name, null_id) in enumerate(zip(null_names, NULL_INT_IDS[mt]))
+    ]
+
+
+def make_names(mt: str, n: int) -> list[tuple[str, Optional[bool]]]:
+    """Names and 'ifk' of the model type. Includes the most used names of the dropdowns."""
+    mu = MOST_USED.get(mt, {})
+    mu_by_ifk = {ifk: mu.get(pt, []) for ifk, pt in [(True, PT.KILLER), (False, PT.SURV)]}
+    both = set(mu_by_ifk[True]) & set(mu_by_ifk[False])
+
+    names = {name: None for name in both}
+    for ifk, mu_names in mu_by_ifk.items():
+        names |= {name: ifk for name in mu_names if name not in both}
+    names |= {f"{mt.capitalize()} {i}": bool(i % 3 == 0) for i in range(n)}
+    return list(names.items())
+
+
+def make_predictables(mt: str, rng: Random) -> list[dict]:
+    rows = make_null_rows(mt)
+    next_id = max(r["id"] for r in rows) + 1
+
+    for i, (name, ifk) in enumerate(make_names(mt, N_PREDICTABLES[mt])):
+        type_ids = [
+            t for t in (KILLER_TYPE_IDS if ifk else range(KILLER_TYPE_IDS.start))
+            if not ((mt == MT.ITEM) and (t == EXCLUDED_ITEM_TYPE_ID))
+        ]
+        rows.append(
+            {
+                "id": next_id + i,
+                "name": name,
+                "emoji": EMOJIS[i % len(EMOJIS)],
+                "ifk": ifk,
+                "type_id": rng.choice(type_ids) if mt in MT.WITH_TYPES else None,
+                "rarity_id": rng.choice(RARITIES)[0],
+            }
+        )
+    return rows
+
+
+def link_predictables(predictables: dict[str, list[dict]], rng: Random) -> None:
+    """Add the columns that relate predictables of different model types."""
+    def is_real(p: dict, mt: str) -> bool:
+        return p["name"] not in NULL_IDS_BY_MT[mt]
+
+    powers = [
+        p["id"] for p in predictables[MT.ITEM]
+        if p["ifk"] and is_real(p, MT.ITEM)
+    ]
+
+    chars = predictables[MT.CHARACTER]
+    for i, ch in enumerate(chars):
+        is_legendary = (
+            (i > 0)
+            and (i % 5 == 0)
+            and is_real(ch, MT.CHARACTER)
+            and is_real(chars[i - 1], MT.CHARACTER)
+            and (chars[i - 1]["ifk"] == ch["ifk"])
+        )
+        ch["base_char_id"] = chars[i - 1]["base_char_id"] if is_legendary else ch["id"]
+        ch["power_id"] = (
+            (chars[i - 1]["power_id"] if is_legendary else rng.choice(powers))
+            if ch["ifk"] and is_real(ch, MT.CHARACTER)
+            else None
+        )
+
+    for ad in predictables[MT.ADDONS]:
+        ad["item_id"] = (
+            rng.choice(powers)
+            if ad["ifk"] and is_real(ad, MT.ADDONS)
+            else None
+        )
+
+
+# * Matches and labels
+
+
+def now_iso() -> str:
+    """Current modification date, in the API's ISO format."""
+    return datetime.now(timezone.utc).isoformat()
+
+
+def make_matches(n_matches: int) -> list[dict]:
+    return [
+        {
+            "id": m_id,
+            "filename": f"match_{m_id:05d}.png",
+            "match_date": str(date(2024, 1, 1) + timedelta(days=m_id % 365)),
+            "dbdv_id": 1 + m_id % 10,
+            "date_modified": now_iso(),
+        }
+        for m_id in range(1, n_matches + 1)
+    ]
+
+
+def make_player(
+    pl_id: int,
+    predictables: dict[str, list[dict]],
+    rng: Random,
+) -> dict:
+    ifk = pl_id == KILLER_PLAYER_ID
+    player = {"id": pl_id}
+    for mt, id_name in TO_ID_NAMES.items():
+        if mt not in ALL_MT_MULT:
+            player[id_name] = 0
+            continue
+
+        ids = [p["id"] for p in predictables[mt] if p["ifk"] in (None, ifk)]
+        n = len(MT_TO_COLS.get(mt, [mt]))
+        player[id_name] = (
+            [rng.choice(ids) for _ in range(n)]
+            if n > 1
+            else rng.choice(ids)
+        )
+    return player
+
+
+def make_labels(
+    matches: list[dict],
+    predictables: dict[str, list[dict]],
+    checked_ratio: float,
+    rng: Random,
+) -> list[dict]:
+    return [
+        {
+            "match_id": m["id"],
+            "date_modified": now_iso(),
+            "player": make_player(pl_id, predictables, rng),
+            "manual_checks": {
+                "predictables": {
+                    c[:-5]: rng.random() < checked_ratio
+                    for c in MANUALLY_CHECKED_COLS
+                }
+            },
+        }
+        for m in matches
+        for pl_id in range(N_PLAYERS)
+    ]
+
+
+# * Main function
+
+
+def make_synthetic_data(
+    n_matches: int,
+    checked_ratio: float = 0.3,
+    seed: int = 42,
+) -> SyntheticData:
+    """Make reproducible synthetic data for the stand-in API."""
+    rng = Random(seed)
+
+    predictables = {mt: make_predictables(mt, rng) for mt in ALL_MT_MULT}
+    link_predictables(predictables, rng)
+
+    matches = make_matches(n_matches)
+    return SyntheticData(
+        rarity=[{"id": i, "name": name, "emoji": em} for i, name, em in RARITIES],
+        predictables=predictables,
+        types={mt: make_types(mt) for mt in MT.WITH_TYPES},
+        matches=matches,
+        labels=make_labels(matches, predictables, checked_ratio, rng),
+    )
@@ -0,0 +1,33 @@
+"""Timing helpers for the benchmarks."""
+
+from statistics import mean, quantiles
+from time import perf_counter
+from typing import Callable
+
+
+def time_calls(f: Callable[[], object], n: int) -> tuple[list[float], float]:
+    """Call 'f' n times. Return per-call latencies and the wall time, in seconds."""
+    latencies = []
+    start = perf_counter()
+    for _ in range(n):
+        t0 = perf_counter()
+        f()
+        latencies.append(perf_counter() - t0)
+    return latencies, perf_counter() - start
+
+
+def summarize(name: str, latencies: list[float], wall: float) -> str:
+    """Summary line: throughput and latency percentiles in milliseconds."""
+    n = len(latencies)
+    if n == 0:
+        return f"{name:<32} no calls"
+    ms = sorted(v * 1000 for v in latencies)
+    p50, p95 = (
+        (quantiles(ms, n=100)[49], quantiles(ms, n=100)[94])
+        if n > 1
+        else (ms[0], ms[0])
+    )
+    return (
+        f"{name:<32} n={n:<5} {n / wall:8.1f}/s  "
+        f"mean={mean(ms):8.2f}ms  p50={p50:8.2f}ms  p95={p95:8.2f}ms  max={ms[-1]:8.2f}ms"
+    )
@@ -2,6 +2,5 @@
 
 from pandas import DataFrame
 
-MatchesDataFrame = DataFrame  # index = id
-LabelsDataFrame = DataFrame  # index = (match_id, player_id)
-CurrentDataFrame = DataFrame  # cols: m_id, m_filename, m_match_date, m_dbdv_id, label_id, player_id, item_id
+MatchesDataFrame = DataFrame  # index = id (dtypes: see data.store)
+LabelsDataFrame = DataFrame  # index = (match_id, player_id) (dtypes: see data.store)
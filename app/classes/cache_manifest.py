@@ -0,0 +1,87 @@
+"""CacheManifest class code."""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+import json
+import os
+from threading import Lock
+from time import time
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from dbdie_classes.base import Path
+
+
+@dataclass
+class ManifestEntry:
+    """Cache information of a single cached file."""
+
+    fetched_at : float  # UNIX timestamp of the last fetch or revalidation
+    rows       : int
+    sha256     : str  # hash of the API response content
+    etag       : Optional[str] = None
+
+
+class CacheManifest:
+    """Manifest of the files cached from the API, keyed by their paths.
+    An entry is fresh if its file exists and it was fetched less than 'ttl' seconds ago.
+    """
+
+    def __init__(self, path: "Path", entries: dict[str, ManifestEntry], ttl: float) -> None:
+        self.path = path
+        self.entries = entries
+        self.ttl = ttl
+        self._lock = Lock()
+
+    @classmethod
+    def load(cls, path: "Path", ttl: float) -> CacheManifest:
+        """Load manifest from its JSON file. A missing or corrupt file is an empty manifest."""
+        try:
+            with open(path) as f:
+                entries = {k: ManifestEntry(**v) for k, v in json.load(f).items()}
+        except (FileNotFoundError, json.JSONDecodeError, TypeError):
+            entries = {}
+        return CacheManifest(path, entries, ttl)
+
+    def save(self) -> None:
+        """Save manifest to its JSON file atomically.
+        The lock is held until the file is replaced, as warm-up tasks save concurrently.
+        """
+        with self._lock:
+            data = {k: asdict(v) for k, v in self.entries.items()}
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(data, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+    def get(self, path: "Path") -> Optional[ManifestEntry]:
+        """Get entry of the cached file, provided that the file exists."""
+        entry = self.entries.get(path)
+        return entry if (entry is not None) and os.path.isfile(path) else None
+
+    def is_fresh(self, path: "Path") -> bool:
+        """Whether the cached file can be used without asking the API."""
+        entry = self.get(path)
+        return (entry is not None) and (time() - entry.fetched_at < self.ttl)
+
+    def conditional_headers(self, path: "Path") -> dict[str, str]:
+        """Headers for revalidating the cached file with a conditional request."""
+        entry = self.get(path)
+        return (
+            {"If-None-Match": entry.etag}
+            if (entry is not None) and (entry.etag is not None)
+            else {}
+        )
+
+    def record(self, path: "Path", rows: int, sha256: str, etag: Optional[str]) -> None:
+        """Record a newly fetched file."""
+        with self._lock:
+            self.entries[path] = ManifestEntry(time(), rows, sha256, etag)
+        self.save()
+
+    def touch(self, path: "Path") -> None:
+        """Mark a cached file as revalidated against the API."""
+        with self._lock:
+            self.entries[path].fetched_at = time()
+        self.save()
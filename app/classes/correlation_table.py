@@ -0,0 +1,19 @@
+"""CorrelationTable class code."""
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from dbdie_classes.base import ModelType
+
+    from classes.gradio import Options
+
+
+@dataclass(frozen=True)
+class CorrelationTable:
+    """Options of a correlated fmt for each precondition id (item, power or item type id)."""
+
+    precond_mt : "ModelType"
+    types      : bool  # whether the precondition ids are item types
+    null_opts  : "Options"  # for precondition ids without options
+    by_precond : dict[int, "Options"]
@@ -0,0 +1,101 @@
+"""CropIndex class code."""
+
+import numpy as np
+import os
+from threading import Lock
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from dbdie_classes.base import Path, PlayerId
+
+CropKey = tuple[str, "PlayerId", int]  # (match filename without extension, player id, item id)
+
+
+class CropIndex:
+    """Index of the crops folder of a full model type.
+    Maps the (match, player, item) keys to the paths of the crops that exist,
+    as named by the cropper: '<match filename w/o extension>_<player id>_<item id>.<ext>'.
+    The folder is rescanned when its mtime changes, i.e. when crops are added or removed.
+    """
+
+    def __init__(self, folder_path: "Path", img_ext: str = "jpg") -> None:
+        self.folder_path = folder_path
+        self.img_ext = img_ext
+
+        self._paths: dict[CropKey, "Path"] = {}
+        self._mtime_ns: Optional[int] = None
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        self.refresh()
+        return len(self._paths)
+
+    def _scan(self) -> dict[CropKey, "Path"]:
+        suffix = f".{self.img_ext}"
+        paths = {}
+        with os.scandir(self.folder_path) as it:
+            for entry in it:
+                if not entry.name.endswith(suffix):
+                    continue
+                try:
+                    stem, pl, item = entry.name[:-len(suffix)].rsplit("_", 2)
+                    paths[(stem, int(pl), int(item))] = entry.path
+                except ValueError:
+                    continue  # not a crop
+        return paths
+
+    def refresh(self) -> None:
+        """Rescan the folder if it has changed since the last scan."""
+        try:
+            mtime_ns = os.stat(self.folder_path).st_mtime_ns
+        except FileNotFoundError:
+            mtime_ns = None
+
+        with self._lock:
+            if (mtime_ns == self._mtime_ns) and (self._mtime_ns is not None):
+                return
+            self._paths = self._scan() if mtime_ns is not None else {}
+            self._mtime_ns = mtime_ns
+
+    def paths(
+        self,
+        filenames: np.ndarray,
+        player_ids: np.ndarray,
+        item_ids: np.ndarray,
+    ) -> list[Optional["Path"]]:
+        """Paths of the crops of the (match filename, player id, item id) keys.
+        They're None for the crops that don't exist.
+        """
+        self.refresh()
+        paths = self._paths
+        return [
+            paths.get((filename[:-4], pl, it))
+            for filename, pl, it in zip(
+                np.asarray(filenames).tolist(),
+                np.asarray(player_ids).tolist(),
+                np.asarray(item_ids).tolist(),
+            )
+        ]
+
+    def mtime_ns(self, path: "Path") -> Optional[int]:
+        """Modification time of a crop, or None if it doesn't exist.
+        It's read from the crop itself, as a crop regenerated in place doesn't change
+        the folder's mtime.
+        """
+        try:
+            return os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def missing(
+        self,
+        filenames: np.ndarray,
+        player_ids: np.ndarray,
+        item_ids: np.ndarray,
+    ) -> np.ndarray:
+        """Boolean mask of the (match filename, player id, item id) keys without a crop."""
+        return np.fromiter(
+            (p is None for p in self.paths(filenames, player_ids, item_ids)),
+            dtype=bool,
+            count=len(filenames),
+        )
@@ -0,0 +1,71 @@
+"""CurrentWindow class code."""
+
+from __future__ import annotations
+
+import numpy as np
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from dbdie_classes.base import LabelId
+
+
+class CurrentWindow:
+    """Cells of the current labeling step, as one numpy array per field.
+    Cells go player by player: (pl0p1, pl0p2, pl0p3, pl0p4, pl1p1, ...).
+    """
+
+    __slots__ = (
+        "m_id",
+        "m_filename",
+        "m_match_date",
+        "m_dbdv_id",
+        "label_id",
+        "player_id",
+        "item_id",
+    )
+
+    def __init__(
+        self,
+        m_id: np.ndarray,
+        m_filename: np.ndarray,
+        m_match_date: np.ndarray,
+        m_dbdv_id: np.ndarray,
+        label_id: np.ndarray,
+        player_id: np.ndarray,
+        item_id: np.ndarray,
+    ) -> None:
+        self.m_id = m_id
+        self.m_filename = m_filename
+        self.m_match_date = m_match_date
+        self.m_dbdv_id = m_dbdv_id
+        self.label_id = label_id
+        self.player_id = player_id
+        self.item_id = item_id
+
+    @classmethod
+    def empty(cls) -> CurrentWindow:
+        """Window without cells, for when the labeling is done."""
+        return CurrentWindow(*(np.empty(0, dtype=object) for _ in cls.__slots__))
+
+    def __len__(self) -> int:
+        return len(self.label_id)
+
+    def __repr__(self) -> str:
+        return f"CurrentWindow(m_id={self.m_id.tolist()}, label_id={self.label_id.tolist()})"
+
+    @property
+    def labels(self) -> list["LabelId"]:
+        """Label ids of the cells."""
+        return self.label_id.tolist()
+
+    def with_labels(self, label_id: np.ndarray) -> CurrentWindow:
+        """Same window with other label ids."""
+        return CurrentWindow(
+            self.m_id,
+            self.m_filename,
+            self.m_match_date,
+            self.m_dbdv_id,
+            label_id,
+            self.player_id,
+            self.item_id,
+        )
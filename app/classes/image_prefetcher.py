@@ -0,0 +1,92 @@
+"""ImagePrefetcher class code."""
+
+import atexit
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import RLock
+from typing import TYPE_CHECKING, Callable
+
+from api import get_match_image
+
+if TYPE_CHECKING:
+    from PIL import ImageFile
+
+    from dbdie_classes.base import MatchId
+
+    from classes.labeler import Labeler
+
+
+class ImagePrefetcher:
+    """Prefetcher of the match images that are about to be shown.
+    Images are fetched and decoded in the background and kept in a bounded
+    in-memory LRU cache, so that a click is usually served from memory.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[["MatchId"], "ImageFile"] = get_match_image,
+        lookahead: int = 3,
+        max_size: int = 16,
+        max_workers: int = 2,
+    ) -> None:
+        assert lookahead >= 0
+        assert max_size > lookahead, "The cache must fit the current and upcoming images"
+
+        self.fetch = fetch
+        self.lookahead = lookahead
+        self.max_size = max_size
+
+        self._cache: OrderedDict["MatchId", Future] = OrderedDict()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="image-prefetch",
+        )
+        self._lock = RLock()  # done callbacks can run inside _submit
+        atexit.register(self.close)
+
+    def _load(self, match_id: "MatchId") -> "ImageFile":
+        img = self.fetch(match_id)
+        img.load()  # decode off the critical path
+        return img
+
+    def _submit(self, match_id: "MatchId") -> Future:
+        """Get the future of the match image, submitting its fetch if needed.
+        Must be called with the lock held.
+        """
+        fut = self._cache.get(match_id)
+        if fut is not None:
+            self._cache.move_to_end(match_id)
+            return fut
+
+        fut = self._executor.submit(self._load, match_id)
+        self._cache[match_id] = fut
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+
+        fut.add_done_callback(lambda f: self._forget_failed(match_id, f))
+        return fut
+
+    def _forget_failed(self, match_id: "MatchId", fut: Future) -> None:
+        """Drop a failed fetch so that it is retried on the next request."""
+        if fut.exception() is None:
+            return
+        with self._lock:
+            if self._cache.get(match_id) is fut:
+                del self._cache[match_id]
+
+    def get(self, match_id: "MatchId") -> "ImageFile":
+        """Get the match image, waiting for its fetch if it isn't ready yet."""
+        with self._lock:
+            fut = self._submit(match_id)
+        return fut.result()  # re-raises the fetch's exception
+
+    def prefetch(self, labeler: "Labeler") -> None:
+        """Fetch in the background the images of the labeler's upcoming matches."""
+        match_ids = labeler.upcoming_match_ids(self.lookahead)
+        with self._lock:
+            for match_id in match_ids:
+                self._submit(match_id)
+
+    def close(self) -> None:
+        """Stop the background fetches that haven't started yet."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
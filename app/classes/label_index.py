@@ -0,0 +1,78 @@
+"""LabelIndex class code."""
+
+import numpy as np
+from threading import Lock
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from dbdie_classes.base import IsForKiller, MatchId, ModelType, PlayerId
+
+    from classes.base import LabelsDataFrame
+
+KILLER_PLAYER_ID = 4
+
+
+class LabelIndex:
+    """Index of the labels table, built once and shared by all Labelers.
+    Holds the match and player ids of each row, the killer and survivor partitions,
+    the pending rows of each model type and the row position of each
+    (match_id, player_id) key.
+    Only depends on the table's index and manual checks, which don't change while
+    labeling, so it's valid as long as no rows are added or removed.
+    Also keeps a version of each model type's labels, bumped when they're edited.
+    """
+
+    def __init__(self, labels: "LabelsDataFrame") -> None:
+        self.labels = labels
+
+        self.match_ids = labels.index.get_level_values(0).to_numpy()
+        self.player_ids = labels.index.get_level_values(1).to_numpy()
+        is_killer = self.player_ids == KILLER_PLAYER_ID
+
+        self.partitions: dict["IsForKiller", np.ndarray] = {
+            False: np.flatnonzero(~is_killer),
+            True: np.flatnonzero(is_killer),
+        }
+        self.positions: dict[tuple["MatchId", "PlayerId"], int] = {
+            key: pos
+            for pos, key in enumerate(
+                zip(self.match_ids.tolist(), self.player_ids.tolist())
+            )
+        }
+        self._pending: dict[tuple["ModelType", "IsForKiller"], np.ndarray] = {}
+        self.versions: dict["ModelType", int] = {}
+        self.write_lock = Lock()  # held to edit and read the labels, shared by all sessions
+
+    def version(self, mt: "ModelType") -> int:
+        """Version of the model type's labels."""
+        return self.versions.get(mt, 0)
+
+    def bump(self, mt: "ModelType") -> None:
+        """Mark the model type's labels as edited."""
+        self.versions[mt] = self.version(mt) + 1
+
+    def partition(self, ifk: "IsForKiller") -> np.ndarray:
+        """Integer (0-based) row positions of the killer or survivor labels."""
+        return self.partitions[ifk]
+
+    def pending(self, mt: "ModelType", ifk: "IsForKiller") -> np.ndarray:
+        """Integer (0-based) row positions of the labels of the player type
+        whose model type hasn't been manually checked.
+        """
+        key = (mt, ifk)
+        if key not in self._pending:
+            part = self.partitions[ifk]
+            checked = self.labels[f"{mt}_mckd"].values[part]
+            self._pending[key] = part[~checked]
+        return self._pending[key]
+
+    def positions_of(self, match_ids: np.ndarray, player_ids: np.ndarray) -> np.ndarray:
+        """Row positions of the labels of the (match_id, player_id) keys."""
+        return np.fromiter(
+            (
+                self.positions[key]
+                for key in zip(match_ids.tolist(), player_ids.tolist())
+            ),
+            dtype=np.intp,
+            count=len(match_ids),
+        )
@@ -0,0 +1,141 @@
+"""LabelJournal class code."""
+
+from __future__ import annotations
+
+from dataclasses import asdict
+import json
+import os
+from threading import Lock
+from typing import TYPE_CHECKING
+
+from classes.label_upload import LabelUpload
+
+if TYPE_CHECKING:
+    from dbdie_classes.base import MatchId, Path, PlayerId
+
+UploadKey = tuple["MatchId", "PlayerId", str]  # (match id, player id, id name)
+JournaledUpload = tuple[int, LabelUpload]  # (sequence number, upload)
+
+
+def upload_key(upload: LabelUpload) -> UploadKey:
+    return upload.match_id, upload.player_id, upload.id_name
+
+
+def from_record(record: dict) -> LabelUpload:
+    """Upload from its journal record, where JSON turned the labels tuple into a list."""
+    labels = record["labels"]
+    return LabelUpload(
+        **(record | {"labels": tuple(labels) if isinstance(labels, list) else labels})
+    )
+
+
+class LabelJournal:
+    """Append-only local journal of the label uploads, in JSON Lines.
+    Uploads are written and synced to disk before they're attempted, and acknowledged
+    once they succeed, so the ones that were lost by a crash or an API outage can be
+    replayed on restart.
+    Uploads are idempotent by (match id, player id, id name): only the latest one
+    of each key is pending, and acknowledging it settles the older ones too.
+    """
+
+    def __init__(
+        self,
+        path: "Path",
+        latest: dict[UploadKey, JournaledUpload],
+        acked: set[int],
+        seq: int,
+    ) -> None:
+        self.path = path
+        self._latest = latest
+        self._acked = acked
+        self._seq = seq
+        self._lock = Lock()
+
+    @classmethod
+    def load(cls, path: "Path") -> LabelJournal:
+        """Load journal from its file and compact it to its pending uploads.
+        A missing file is an empty journal, and a torn last line is ignored.
+        """
+        latest: dict[UploadKey, JournaledUpload] = {}
+        acked: set[int] = set()
+        seq = 0
+        try:
+            with open(path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        if "ack" in record:
+                            acked.add(record["ack"])
+                            continue
+                        rec_seq, upload = record["seq"], from_record(record["upload"])
+                    except (json.JSONDecodeError, KeyError, TypeError):
+                        continue  # torn write of a crash
+
+                    seq = max(seq, rec_seq)
+                    key = upload_key(upload)
+                    if (key not in latest) or (latest[key][0] < rec_seq):
+                        latest[key] = (rec_seq, upload)
+        except FileNotFoundError:
+            pass
+
+        journal = LabelJournal(path, latest, acked, seq)
+        journal.compact()
+        return journal
+
+    def _write(self, records: list[dict], mode: str, path: "Path", sync: bool = True) -> None:
+        with open(path, mode) as f:
+            f.writelines(json.dumps(r) + "\n" for r in records)
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+
+    def append(self, uploads: list[LabelUpload]) -> list[JournaledUpload]:
+        """Write the uploads to the journal before attempting them.
+        Returns them with their sequence numbers, needed to acknowledge them.
+        """
+        with self._lock:
+            journaled = []
+            for upload in uploads:
+                self._seq += 1
+                journaled.append((self._seq, upload))
+                self._latest[upload_key(upload)] = (self._seq, upload)
+
+            self._write(
+                [{"seq": seq, "upload": asdict(upl)} for seq, upl in journaled],
+                "a",
+                self.path,
+            )
+        return journaled
+
+    def ack(self, seq: int) -> None:
+        """Acknowledge that the upload with sequence number 'seq' succeeded."""
+        with self._lock:
+            self._acked.add(seq)
+            # A lost ack only repeats an idempotent upload, so it isn't synced
+            self._write([{"ack": seq}], "a", self.path, sync=False)
+
+    def pending(self) -> list[JournaledUpload]:
+        """Uploads that haven't succeeded yet, latest one per key, in journal order."""
+        with self._lock:
+            return sorted(
+                (
+                    (seq, upl) for seq, upl in self._latest.values()
+                    if seq not in self._acked
+                ),
+                key=lambda j: j[0],
+            )
+
+    def compact(self) -> None:
+        """Rewrite the journal with only its pending uploads, atomically."""
+        pending = self.pending()
+        with self._lock:
+            self._latest = {upload_key(upl): (seq, upl) for seq, upl in pending}
+            self._acked = set()
+
+            tmp_path = f"{self.path}.tmp"
+            self._write(
+                [{"seq": seq, "upload": asdict(upl)} for seq, upl in pending],
+                "w",
+                tmp_path,
+            )
+            os.replace(tmp_path, self.path)
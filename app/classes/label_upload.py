@@ -0,0 +1,32 @@
+"""LabelUpload class code."""
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Union
+
+if TYPE_CHECKING:
+    from dbdie_classes.base import LabelId, MatchId, PlayerId
+
+
+@dataclass(frozen=True)
+class LabelUpload:
+    """Labels of a single player of a match, ready to be uploaded."""
+
+    match_id  : "MatchId"
+    player_id : "PlayerId"
+    id_name   : str  # name of the model type's id field in the API
+    labels    : Union["LabelId", tuple["LabelId", ...]]
+
+    @property
+    def params(self) -> dict:
+        """Query parameters of the upload request."""
+        return {"match_id": self.match_id, "strict": True}
+
+    @property
+    def json(self) -> dict:
+        """Body of the upload request."""
+        return {
+            "id": self.player_id,
+            self.id_name: (
+                list(self.labels) if isinstance(self.labels, tuple) else self.labels
+            ),
+        }
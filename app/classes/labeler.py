@@ -2,20 +2,22 @@
 
 from dbdie_classes.options.FMT import assert_mt_and_pt, from_fmt
 from dbdie_classes.paths import absp, CROPS_MAIN_FD_RP
-import os
 import numpy as np
 import pandas as pd
 from typing import TYPE_CHECKING, Optional
 
+from classes.crop_index import CropIndex
+from classes.current_window import CurrentWindow
 from classes.labels_counter import LabelsCounter
 from code.labeler import (
     filter_data,
     init_cols,
     init_dims,
     init_current,
+    init_match_arrays,
     init_pending,
     merge_with_types,
-    prefilter_data,
+    process_matches,
     update_current,
 )
 
@@ -29,25 +31,40 @@ if TYPE_CHECKING:
         PlayerId,
     )
 
-    from classes.base import LabelsDataFrame, MatchesDataFrame
+    from classes.base import MatchesDataFrame
+    from classes.label_index import LabelIndex
+    from classes.work_allocator import Lease, WorkAllocator
 
 
 class Labeler:
-    """Helper class for labeling purposes."""
+    """Helper class for labeling purposes.
+    If an 'allocator' is given, the labeler only goes over the pending rows leased
+    to its 'owner' session, which are leased as the labeling goes on.
+    """
+
+    LEASE_AHEAD = 3  # windows leased beyond the next one, for the look-ahead
 
     def __init__(
         self,
         matches: "MatchesDataFrame",  # TODO: disallow modifying cols other than the mt's
-        labels: "LabelsDataFrame",
+        label_index: "LabelIndex",  # shared by all labelers
         fmt: "FullModelType",
+        allocator: Optional["WorkAllocator"] = None,  # shared by all sessions
+        owner: Optional[str] = None,
+        crops: Optional[CropIndex] = None,  # shared by all sessions
+        match_lookup: Optional[tuple[pd.Index, dict[str, np.ndarray]]] = None,  # idem
     ) -> None:
         self.matches = matches  # id must be the index
-        self.labels = labels  # idem: (match_id, player_id)
+        self.label_index = label_index
+        self.labels = label_index.labels  # idem: (match_id, player_id)
+        self.match_index, self.match_arrays = (
+            match_lookup if match_lookup is not None else init_match_arrays(matches)
+        )
 
         self.fmt = fmt
         self.mt, self.pt, self.ifk = from_fmt(self.fmt)
         assert_mt_and_pt(self.mt, self.pt)
-        self.folder_path = absp(f"{CROPS_MAIN_FD_RP}/{fmt}")
+        self.crops = crops if crops is not None else CropIndex(absp(f"{CROPS_MAIN_FD_RP}/{fmt}"))
 
         self.columns, self.column_ixs = init_cols(self.mt, self.labels)
 
@@ -58,9 +75,10 @@ class Labeler:
             self.mt,
             self.ifk,
         )
+        self.item_ids = self.current.item_id
 
         # Pending labels (rows) array and its current pointers
-        self.pending, total = init_pending(self.labels, self.mt, self.ifk)
+        self.pending, total = init_pending(self.label_index, self.mt, self.ifk)
 
         total_labels = total * n_items
         pending_labels = self.pending.size * n_items
@@ -72,6 +90,20 @@ class Labeler:
             n_items=n_items,
         )
 
+        assert (allocator is None) or (owner is not None)
+        self.allocator = allocator
+        self.owner = owner
+        self.leases: list[tuple[int, "Lease"]] = []  # (pointer of its first row, lease)
+        self.uploaded = 0  # number of leading pending rows whose windows were all uploaded
+        self.uploaded_windows: set[int] = set()  # pointers of the ones uploaded beyond
+        if allocator is not None:
+            self.pending = self.pending[:0]
+
+    @property
+    def folder_path(self) -> "Path":
+        """Crops folder of the fmt."""
+        return self.crops.folder_path
+
     @property
     def n_players(self) -> int:
         """Number of players in a labeling step that is full."""
@@ -90,7 +122,7 @@ class Labeler:
     @property
     def done(self) -> bool:
         """Whether the predictable labeling is done."""
-        return self.counts.done
+        return self.counts.done or (self.counts.ptr_min >= self.pending.size)
 
     def wrap(self, values: list) -> np.ndarray:
         """Wrap values as a (n_players, n_items) matrix."""
@@ -101,7 +133,7 @@ class Labeler:
         Can have a value between 0 and (total_cells - 1).
         """
         assert ix >= 0
-        return self.current["m_filename"].iat[ix] if not self.done else None
+        return self.current.m_filename[ix] if not self.done else None
 
     def get_key(self, player_ix: int) -> tuple["MatchId", "PlayerId"]:
         """Get primary key of the player with integer index 'ix' in the current labels.
@@ -109,57 +141,123 @@ class Labeler:
         """
         assert player_ix >= 0
         ix = player_ix * self.n_items  # min_ix is enough
-        return int(self.current["m_id"].iat[ix]), int(self.current["player_id"].iat[ix])
+        return int(self.current.m_id[ix]), int(self.current.player_id[ix])
+
+    def window_key(self, ptr_min: int) -> Optional[tuple["FullModelType", int]]:
+        """Key of the window that starts at the 'ptr_min' pending row: its fmt and first row.
+        Unlike the pointer, it identifies the same rows when the leased rows change.
+        """
+        if not (0 <= ptr_min < self.pending.size):
+            return None
+        return self.fmt, int(self.pending[ptr_min])
+
+    def upcoming_match_ids(self, n: int) -> list["MatchId"]:
+        """Get the main match ids of the current and the next 'n' labeling steps."""
+        if self.done:
+            return []
+
+        step = self.n_players
+        start = max(self.counts.ptr_min, 0)
+        ptrs = self.pending[start:start + (n + 1) * step:step]
+        return [int(m_id) for m_id in self.label_index.match_ids[ptrs]]
 
     # * Images
 
     def get_limgs(
         self,
         img_ext: str,
-    ) -> list[tuple["Path", "LabelId"]]:
-        """Get labeled images of current selection as a dict."""
+    ) -> list[tuple[Optional["Path"], "LabelId"]]:
+        """Get labeled images of current selection as a dict.
+        Paths are None for the crops that don't exist.
+        """
         if self.done:
             return [(None, -1) for _ in range(self.total_cells)]
 
-        return [
-            (
-                os.path.join(
-                    self.folder_path,
-                    f"{self.filename(i)[:-4]}_{pl}_{it}.{img_ext}",
-                ),
-                int(lbl),
-            )
-            for i, (lbl, pl, it) in enumerate(
-                zip(
-                    self.current["label_id"].values,
-                    self.current["player_id"].values,
-                    self.current["item_id"].values,
-                )
-            )
-        ]
-
-    def get_crops(self, img_ext: str) -> list["Path"]:
-        """Get labeled images of current selection as a flattened list."""
-        return [
-            os.path.join(
-                self.folder_path,
-                f"{self.filename(i)[:-4]}_{pl}_{it}.{img_ext}",
-            )
-            for i, (pl, it) in enumerate(
-                zip(
-                    self.current["player_id"].values,
-                    self.current["item_id"].values,
-                )
-            )
-        ]
+        return list(zip(self.get_crops(img_ext), self.current.labels))
+
+    def get_crops(
+        self,
+        img_ext: str,
+        current: Optional[CurrentWindow] = None,
+    ) -> list[Optional["Path"]]:
+        """Get labeled images of current selection as a flattened list.
+        A window other than the labeler's current one can be passed as 'current'.
+        Paths are None for the crops that don't exist.
+        """
+        assert img_ext == self.crops.img_ext
+        current = self.current if current is None else current
+        return self.crops.paths(current.m_filename, current.player_id, current.item_id)
+
+    def missing_crops(self) -> list["MatchId"]:
+        """Get the pending matches that have missing crops, checked in bulk."""
+        ptrs = self.pending
+        filenames = process_matches(self, ptrs)["m_filename"]
+        missing = self.crops.missing(
+            filenames,
+            np.repeat(self.label_index.player_ids[ptrs], self.n_items),
+            np.tile(np.arange(self.n_items), ptrs.size),
+        )
+        match_ids = self.label_index.match_ids[ptrs]
+        return np.unique(match_ids[missing.reshape(-1, self.n_items).any(axis=1)]).tolist()
 
     # * Current pointer management
 
-    def next(self, go_back: bool = False) -> list["LabelId"]:
-        """Proceed to the next match & labels."""
+    def mark_uploaded(self) -> None:
+        """Record that the labels of the current window were uploaded."""
+        self.uploaded_windows.add(self.counts.ptr_min)
+        while self.uploaded in self.uploaded_windows:
+            self.uploaded_windows.remove(self.uploaded)
+            self.uploaded += self.n_players
+
+    def report_uploaded(self) -> None:
+        """Report the leased rows whose windows were uploaded as labeled."""
+        for start, lease in self.leases:
+            self.allocator.advance(lease, self.uploaded - start)
+
+    def sync_leases(self) -> None:
+        """Report the labeling progress of the leased rows, renew the leases
+        and lease rows for the next windows.
+        Only the windows that were uploaded count as labeled, not the ones that were
+        just shown, e.g. before going back.
+        The rows of a lease that was lost, because it expired and was handed out again,
+        are dropped from the ones that weren't reached yet.
+        """
+        if self.allocator is None:
+            return
+
+        self.report_uploaded()
+        self.allocator.renew(self.owner)
+
+        reached = max(self.counts.ptr_min_reach + self.n_players, 0)
+        for ix, (start, lease) in enumerate(self.leases):
+            if (start + lease.rows.size > reached) and not self.allocator.holds(lease):
+                print(f"[WARNING] {self.fmt}: lease expired, its remaining rows were dropped")
+                self.pending = self.pending[:max(start, reached)]
+                self.uploaded_windows = {p for p in self.uploaded_windows if p < self.pending.size}
+                self.leases = self.leases[:ix]
+                break
+
+        upto = reached + (1 + self.LEASE_AHEAD) * self.n_players
+        while self.pending.size < upto:
+            lease = self.allocator.lease(self.fmt, self.n_players, self.owner)
+            if lease is None:
+                break
+            self.leases.append((self.pending.size, lease))
+            self.pending = np.concatenate((self.pending, lease.rows))
+
+    def next(
+        self,
+        go_back: bool = False,
+        ready: Optional[CurrentWindow] = None,
+    ) -> list["LabelId"]:
+        """Proceed to the next match & labels.
+        'ready' is the next window if it was already computed (see 'WindowLookahead').
+        """
+        self.sync_leases()
+
         # Prevent updating the pointer beyond completion
         if not go_back and (self.counts.ptr_min >= self.pending.size):
-            return self.current["label_id"].to_list()
+            return self.current.labels
         elif go_back and (self.counts.ptr_min <= 0):
             raise ValueError("Labeler pointer out of bounds.")
 
@@ -168,12 +266,13 @@ class Labeler:
 
         # Check if all matches have been labeled
         self.current = (
-            pd.DataFrame(columns=self.current.columns)
+            CurrentWindow.empty()
             if self.done
+            else ready if ready is not None
             else update_current(self, update_match=True)
         )
 
-        return self.current["label_id"].to_list()  # (pl0p1, pl0p2, pl0p3, pl0p4, pl1p1, ...) (16)
+        return self.current.labels  # (pl0p1, pl0p2, pl0p3, pl0p4, pl1p1, ...) (16)
 
     def previous(self) -> list["LabelId"]:
         """Go to the previous match & labels."""
@@ -184,7 +283,9 @@ class Labeler:
         assert len(new_labels) == self.total_cells
 
         ptrs = self.pending[self.counts.ptr_min:self.counts.ptr_max]
-        self.labels.iloc[ptrs, self.column_ixs] = self.wrap(new_labels)
+        with self.label_index.write_lock:
+            self.labels.iloc[ptrs, self.column_ixs] = self.wrap(new_labels)
+            self.label_index.bump(self.mt)
 
         self.current = update_current(self, update_match=False)
 
@@ -194,13 +295,17 @@ class Labeler:
         self,
         fmt: "FullModelType",
         types: bool,
+        current: Optional[CurrentWindow] = None,
     ) -> pd.Series:
-        """Filter another fmt with the current info of the labeler's fmt."""
+        """Filter another fmt with the current info of the labeler's fmt.
+        A window other than the labeler's current one can be passed as 'current'.
+        """
         assert fmt != self.fmt
-        mt, _, ifk = from_fmt(fmt)
+        mt, _, _ = from_fmt(fmt)
 
-        data = prefilter_data(self.labels, mt, ifk)
-        result = filter_data(data, self.current)
-        result = merge_with_types(result, types, fmt, mt)
-
-        return result
+        result = filter_data(
+            self.label_index,
+            mt,
+            self.current if current is None else current,
+        )
+        return merge_with_types(result, types, fmt, mt)
@@ -5,14 +5,19 @@ from dbdie_classes.options.FMT import assert_mt_and_pt, from_fmt, to_fmt
 from dbdie_classes.options.MODEL_TYPE import PERKS, WITH_TYPES
 from dbdie_classes.options.MODEL_TYPE import ALL_MULTIPLE_CHOICE as ALL_MT_MULT
 from dbdie_classes.options.PLAYER_TYPE import pt_to_ifk, SURV
-from typing import TYPE_CHECKING
+from threading import Lock
+from typing import TYPE_CHECKING, Optional
 
 from classes.labels_counter import LabelsCounter
+from classes.options_catalog import OptionsCatalog
+from classes.window_history import WindowHistory
+from classes.window_lookahead import WindowLookahead
 from code.fmt_correl import get_fmt_correlation_dict
 from code.labeler_selector import (
     options_with_types,
     options_wo_types,
 )
+from constants import CROP_W
 
 if TYPE_CHECKING:
     from dbdie_classes.base import (
@@ -23,16 +28,23 @@ if TYPE_CHECKING:
         ModelType,
     )
 
+    from classes.current_window import CurrentWindow
     from classes.gradio import OptionsList
     from classes.labeler import Labeler
+    from PIL.Image import Image
 
 
 class LabelerSelector:
     """Labeler selector.
     Also holds the current list of dictionaries for the predictables' dropdowns.
     """
-    def __init__(self, labelers: dict["FullModelType", "Labeler"]) -> None:
+    def __init__(
+        self,
+        labelers: dict["FullModelType", "Labeler"],
+        catalog: Optional[OptionsCatalog] = None,  # can be shared by all sessions
+    ) -> None:
         self.labelers = labelers
+        self.catalog = catalog if catalog is not None else OptionsCatalog()
 
         # Start the selector with perks__surv
         self._fmt: "FullModelType" = to_fmt(PERKS, False)
@@ -47,6 +59,12 @@ class LabelerSelector:
         self.load()
         self.options_have_changed = False  # Turn off after initial load
 
+        self.images: Optional[list["Image"]] = None  # rescaled crops of the current window
+        self.lock = Lock()  # events of the same session are handled one at a time
+        self.history = WindowHistory()
+        self.lookahead = WindowLookahead(crop_w=CROP_W)
+        self.lookahead.schedule(self)
+
     @property
     def fmt(self) -> "FullModelType":
         """Current full model type."""
@@ -57,7 +75,9 @@ class LabelerSelector:
         self._mt, self._pt, self._ifk = from_fmt(value)
         assert_mt_and_pt(self._mt, self._pt)
         self._fmt = value
+        self.images = None
         self.load()
+        self.lookahead.schedule(self)
 
     @property
     def mt(self) -> "ModelType":
@@ -91,31 +111,73 @@ class LabelerSelector:
         """Current labeler."""
         return self.labelers[self._fmt]
 
-    def load(self) -> None:
-        """Load current predictables from the cache."""
+    def get_options(
+        self,
+        labeler: "Labeler",
+        current: Optional["CurrentWindow"] = None,
+    ) -> "OptionsList":
+        """Get the labeler's options for the 'current' window, or for its own if it's None."""
+        base_opts = self.catalog.get(labeler.mt, labeler.ifk)
+        corr_table = self.catalog.corr_table(labeler)
+        return (
+            options_with_types(labeler, base_opts, corr_table, current)
+            if labeler.mt in WITH_TYPES
+            else options_wo_types(labeler, base_opts)
+        )
+
+    def load(self, options: Optional["OptionsList"] = None) -> None:
+        """Load current predictables from the cache, unless 'options' were already computed."""
         print("LOADING OPTIONS...")
         self.options_have_changed = True
 
         self.options: "OptionsList" = (
-            options_with_types(self.labeler)
-            if self.mt in WITH_TYPES
-            else options_wo_types(self.labeler, self.mt, self.ifk)
+            self.get_options(self.labeler)
+            if options is None
+            else options
         )
 
-    def corr_driven_load(self) -> None:
+    def corr_driven_load(self, options: Optional["OptionsList"] = None) -> None:
         """Run load() method when there is a set correlation between FMTs."""
         fmt_corr_dict = get_fmt_correlation_dict(self.mt, self.ifk)
         if any(fmt_corr_dict.values()):
-            self.load()
+            self.load(options)
 
     def next(self, go_back: bool = False) -> list["LabelId"]:
         """Invoke current Labeler's next() method and run set correlations.
+        Uses the window saved in the history or prepared by the look-ahead, if there's one.
         Returns the next label ids.
         """
-        next_label_ids = self.labeler.next(go_back=go_back)
-        self.corr_driven_load()
+        labeler = self.labeler
+        self.history.save(labeler, self.options, self.images)
+        labeler.sync_leases()  # before taking, as the leased rows can change
+
+        ptr_min = labeler.counts.ptr_min + (-1 if go_back else 1) * labeler.n_players
+        prepared = self.history.take(labeler, ptr_min)
+        if (prepared is None) and (not go_back):
+            prepared = self.lookahead.take(labeler, ptr_min)
+
+        next_label_ids = labeler.next(
+            go_back=go_back,
+            ready=prepared.current if prepared is not None else None,
+        )
+        self.images = (
+            prepared.images
+            if (prepared is not None) and (not labeler.done)
+            else None
+        )
+        self.corr_driven_load(prepared.options if prepared is not None else None)
+        self.lookahead.schedule(self)
         return next_label_ids
 
+    def close(self) -> None:
+        """Stop the background computations and give back the leased rows, if any."""
+        self.lookahead.close()
+        leased = [lbl for lbl in self.labelers.values() if lbl.allocator is not None]
+        for lbl in leased:
+            lbl.report_uploaded()
+        for lbl in leased:
+            lbl.allocator.release(lbl.owner)  # no-op after the first one
+
     def get_all_labels_counters(self) -> dict["ModelType", list[LabelsCounter]]:
         """Get all labelers' LabelCounters.
         For each model type, first goes the survivor and then the killer.
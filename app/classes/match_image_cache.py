@@ -0,0 +1,150 @@
+"""MatchImageCache class code."""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from hashlib import sha256
+from io import BytesIO
+import json
+import os
+from threading import Lock
+from time import time
+from typing import TYPE_CHECKING, Optional
+
+from PIL import Image
+
+from api import fetch_match_image
+
+if TYPE_CHECKING:
+    from PIL import ImageFile
+
+    from dbdie_classes.base import MatchId, Path
+
+
+@dataclass
+class MatchImageEntry:
+    """Cache information of a single match image."""
+
+    fetched_at : float  # UNIX timestamp of the last fetch or revalidation
+    sha256     : str  # hash of the image content, which is also its filename
+    etag       : Optional[str] = None
+
+
+class MatchImageCache:
+    """Persistent, content-addressed disk cache of match images.
+    Images are stored as '<sha256>.img' files and indexed by match id along with
+    their ETag. Entries fetched less than 'ttl' seconds ago are served from disk,
+    and stale ones are revalidated with a conditional request.
+    The folder is kept under 'max_bytes' by evicting the least recently used files.
+    """
+
+    def __init__(
+        self,
+        folder: "Path",
+        entries: dict[str, MatchImageEntry],
+        max_bytes: int,
+        ttl: float,
+    ) -> None:
+        self.folder = folder
+        self.index_path = f"{folder}/index.json"
+        self.entries = entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = Lock()
+
+    @classmethod
+    def load(cls, folder: "Path", max_bytes: int, ttl: float) -> MatchImageCache:
+        """Load cache from its folder. A missing or corrupt index is an empty cache."""
+        os.makedirs(folder, exist_ok=True)
+        try:
+            with open(f"{folder}/index.json") as f:
+                entries = {k: MatchImageEntry(**v) for k, v in json.load(f).items()}
+        except (FileNotFoundError, json.JSONDecodeError, TypeError):
+            entries = {}
+        return MatchImageCache(folder, entries, max_bytes, ttl)
+
+    def img_path(self, entry: MatchImageEntry) -> "Path":
+        return f"{self.folder}/{entry.sha256}.img"
+
+    def save(self) -> None:
+        """Save index to its JSON file atomically. Must be called with the lock held."""
+        data = {k: asdict(v) for k, v in self.entries.items()}
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+    def _get_entry(self, match_id: "MatchId") -> Optional[MatchImageEntry]:
+        """Get entry of the match image, provided that its file exists."""
+        entry = self.entries.get(str(match_id))
+        return entry if (entry is not None) and os.path.isfile(self.img_path(entry)) else None
+
+    def _open_cached(self, entry: MatchImageEntry) -> "ImageFile":
+        path = self.img_path(entry)
+        os.utime(path)  # the mtime marks the last use for the LRU eviction
+        return Image.open(path)
+
+    def _store(self, match_id: "MatchId", content: bytes, etag: Optional[str]) -> None:
+        entry = MatchImageEntry(time(), sha256(content).hexdigest(), etag)
+        path = self.img_path(entry)
+        if not os.path.isfile(path):  # identical images share the same file
+            tmp_path = f"{path}.{match_id}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+
+        with self._lock:
+            self.entries[str(match_id)] = entry
+            self._evict(keep=path)
+            self.save()
+
+    def _evict(self, keep: "Path") -> None:
+        """Remove the least recently used images until the folder fits 'max_bytes'.
+        Must be called with the lock held.
+        """
+        with os.scandir(self.folder) as it:
+            files = [
+                (e.stat().st_mtime, e.stat().st_size, e.path)
+                for e in it
+                if e.name.endswith(".img")
+            ]
+
+        total = sum(size for _, size, _ in files)
+        evicted = set()
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            os.remove(path)
+            evicted.add(os.path.basename(path)[:-4])
+            total -= size
+
+        if evicted:
+            self.entries = {
+                k: v for k, v in self.entries.items() if v.sha256 not in evicted
+            }
+
+    def get(self, match_id: "MatchId") -> "ImageFile":
+        """Get the full image of a match, from the disk cache if possible."""
+        entry = self._get_entry(match_id)
+        if (entry is not None) and (time() - entry.fetched_at < self.ttl):
+            return self._open_cached(entry)
+
+        try:
+            resp = fetch_match_image(match_id, etag=entry.etag if entry is not None else None)
+            if (resp.status_code == 304) and (entry is not None):  # HTTP_304_NOT_MODIFIED
+                with self._lock:
+                    entry.fetched_at = time()
+                    self.save()
+                return self._open_cached(entry)
+            elif resp.status_code != 200:
+                raise AssertionError(resp.reason)
+        except Exception:
+            print(f"[WARNING] Problem with the API (match image {match_id}).")
+            if entry is None:
+                raise
+            return self._open_cached(entry)
+
+        self._store(match_id, resp.content, resp.headers.get("ETag"))
+        return Image.open(BytesIO(resp.content))
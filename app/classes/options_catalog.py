@@ -0,0 +1,82 @@
+"""OptionsCatalog class code."""
+
+import os
+from threading import Lock
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Optional
+
+from code.fmt_correl import build_corr_table, get_corr_paths, get_precond_fmt
+from code.labeler_selector import build_base_options, get_options_paths
+
+if TYPE_CHECKING:
+    from dbdie_classes.base import IsForKiller, ModelType, Path
+
+    from classes.correlation_table import CorrelationTable
+    from classes.gradio import Options
+    from classes.labeler import Labeler
+
+Signature = tuple[Optional[int], ...]  # mtimes of the CSVs an entry is built from
+
+
+class OptionsCatalog:
+    """In-memory catalog of the dropdown options of each fmt, shared by all sessions.
+    Holds the base options and the correlation tables of the correlated fmts.
+    Entries are built once from the cached predictables' CSVs and rebuilt only
+    when any of those files changes on disk.
+    """
+
+    def __init__(self) -> None:
+        self._entries: dict[tuple, tuple[Signature, Any]] = {}
+        self._lock = Lock()
+
+    @staticmethod
+    def _signature(paths: list["Path"]) -> Signature:
+        sig = []
+        for path in paths:
+            try:
+                sig.append(os.stat(path).st_mtime_ns)
+            except FileNotFoundError:
+                sig.append(None)
+        return tuple(sig)
+
+    def _cached(self, key: tuple, paths: list["Path"], build: Callable[[], Any]) -> Any:
+        sig = self._signature(paths)
+
+        entry = self._entries.get(key)
+        if (entry is not None) and (entry[0] == sig):
+            return entry[1]
+
+        value = build()
+        with self._lock:
+            self._entries[key] = (sig, value)
+        return value
+
+    def get(self, mt: "ModelType", ifk: "IsForKiller") -> "Options":
+        """Get the fmt's base options, building them if they're missing or outdated."""
+        return self._cached(
+            ("base", mt, ifk),
+            get_options_paths(mt, ifk),
+            lambda: build_base_options(mt, ifk),
+        )
+
+    def corr_table(self, labeler: "Labeler") -> Optional["CorrelationTable"]:
+        """Get the labeler's correlation table, or None if its fmt isn't correlated."""
+        precond_fmt = get_precond_fmt(labeler.mt, labeler.ifk)
+        if precond_fmt is None:
+            return None
+
+        return self._cached(
+            ("corr", labeler.fmt),
+            get_corr_paths(labeler.fmt),
+            lambda: build_corr_table(labeler, precond_fmt),
+        )
+
+    def warm_up(self, labelers: Iterable["Labeler"]) -> None:
+        """Build the options of the labelers' fmts ahead of time.
+        A fmt whose options fail to build is skipped, and built again when it's opened.
+        """
+        for lbl in labelers:
+            try:
+                self.get(lbl.mt, lbl.ifk)
+                self.corr_table(lbl)
+            except Exception as e:
+                print(f"[WARNING] Couldn't build the options of {lbl.fmt}: {e!r}")
@@ -0,0 +1,90 @@
+"""PredictablesCatalog class code."""
+
+from functools import cache
+import os
+import pandas as pd
+from threading import Lock
+from typing import TYPE_CHECKING
+
+from paths import get_predictable_csv_path
+
+if TYPE_CHECKING:
+    from dbdie_classes.base import FullModelType, ModelType, Path
+
+DTYPES = {
+    "id": "int64",
+    "name": str,
+    "emoji": str,
+    "ifk": "boolean",
+    "type_id": "Int64",
+    "base_char_id": "Int64",
+    "power_id": "Int64",
+    "item_id": "Int64",
+    "rarity_id": "Int64",
+}  # of the columns the UI uses, the ids that can be missing are nullable
+
+
+class PredictablesTable:
+    """Cached predictables CSV held in memory, with the indexes by column that were needed.
+    Its DataFrames are shared, so they must not be modified in place.
+    """
+
+    def __init__(self, df: pd.DataFrame, mtime_ns: int) -> None:
+        self.df = df
+        self.mtime_ns = mtime_ns
+        self._indexes: dict[str, pd.DataFrame] = {}
+
+    def cols(self, usecols: list[str]) -> pd.DataFrame:
+        """Copy of the 'usecols' columns, as if they were read from the CSV.
+        Raises KeyError if any of them is missing.
+        """
+        return self.df[usecols].copy()
+
+    def index(self, col: str) -> pd.DataFrame:
+        """Table indexed by 'col' (not necessarily unique), e.g. by id.
+        It's built the first time it's needed.
+        """
+        table = self._indexes.get(col)
+        if table is None:
+            table = self._indexes[col] = self.df.set_index(col, drop=False)
+        return table
+
+
+class PredictablesCatalog:
+    """In-memory catalog of the cached predictables, item types and rarity tables.
+    Each CSV is read whole, with the DTYPES of its columns, the first time it's needed,
+    and read again only if it changes on disk (e.g. after a cache warm-up).
+    """
+
+    def __init__(self) -> None:
+        self._tables: dict["Path", PredictablesTable] = {}
+        self._lock = Lock()
+
+    def _get(self, path: "Path") -> PredictablesTable:
+        mtime_ns = os.stat(path).st_mtime_ns
+        table = self._tables.get(path)
+        if (table is not None) and (table.mtime_ns == mtime_ns):
+            return table
+
+        table = PredictablesTable(pd.read_csv(path, dtype=DTYPES), mtime_ns)
+        with self._lock:
+            self._tables[path] = table
+        return table
+
+    def predictable(self, fmt: "FullModelType") -> PredictablesTable:
+        """Table of the fmt's predictables."""
+        return self._get(get_predictable_csv_path(fmt, is_type=False))
+
+    def types(self, mt: "ModelType") -> PredictablesTable:
+        """Table of the model type's item types."""
+        return self._get(get_predictable_csv_path(mt, is_type=True))
+
+    def rarity(self) -> PredictablesTable:
+        """Table of the rarities."""
+        return self._get(get_predictable_csv_path("rarity", is_type=False))
+
+
+@cache
+def get_predictables() -> PredictablesCatalog:
+    """Get the process-wide predictables catalog."""
+    return PredictablesCatalog()
@@ -0,0 +1,68 @@
+"""SessionRegistry class code."""
+
+from threading import Lock
+from time import time
+from typing import TYPE_CHECKING, Callable
+
+if TYPE_CHECKING:
+    from classes.labeler_selector import LabelerSelector
+
+
+class SessionRegistry:
+    """Registry of the labeling state of each UI session.
+    Each session gets its own LabelerSelector, made by 'make_selector' from its id,
+    on top of the data shared by all sessions. Sessions idle for more than 'ttl'
+    seconds are closed, which gives back their leased rows.
+    """
+
+    def __init__(
+        self,
+        make_selector: Callable[[str], "LabelerSelector"],
+        ttl: float = 2 * 60 * 60,
+    ) -> None:
+        assert ttl > 0
+        self.make_selector = make_selector
+        self.ttl = ttl
+
+        self._selectors: dict[str, "LabelerSelector"] = {}
+        self._last_seen: dict[str, float] = {}
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._selectors)
+
+    def get(self, session_id: str) -> "LabelerSelector":
+        """Get the session's LabelerSelector, making it for a new session."""
+        now = time()
+        with self._lock:
+            idle = [
+                sid for sid, last_seen in self._last_seen.items()
+                if (sid != session_id) and (now - last_seen > self.ttl)
+            ]
+            for sid in idle:
+                self._close(sid)
+
+            self._last_seen[session_id] = now
+            lbl_sel = self._selectors.get(session_id)
+        if lbl_sel is not None:
+            return lbl_sel
+
+        # Made without the lock, so that it doesn't block the other sessions
+        new_sel = self.make_selector(session_id)
+        with self._lock:
+            lbl_sel = self._selectors.setdefault(session_id, new_sel)
+        if lbl_sel is not new_sel:
+            new_sel.close()
+        return lbl_sel
+
+    def _close(self, session_id: str) -> None:
+        """Close the session. Must be called with the lock held."""
+        lbl_sel = self._selectors.pop(session_id, None)
+        self._last_seen.pop(session_id, None)
+        if lbl_sel is not None:
+            lbl_sel.close()
+
+    def close(self, session_id: str) -> None:
+        """Close the session, e.g. when its browser tab is closed."""
+        with self._lock:
+            self._close(session_id)
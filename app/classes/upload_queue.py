@@ -0,0 +1,140 @@
+"""UploadQueue class code."""
+
+import atexit
+from concurrent.futures import Future, ThreadPoolExecutor
+from queue import Queue
+from threading import Lock, Thread
+from typing import TYPE_CHECKING, Optional
+
+from api import put_label
+from code.api import prepare_label_uploads
+
+if TYPE_CHECKING:
+    from dbdie_classes.base import LabelId
+
+    from classes.label_journal import JournaledUpload, LabelJournal
+    from classes.label_upload import LabelUpload
+    from classes.labeler import Labeler
+
+Upload = tuple[Optional[int], "LabelUpload"]  # (journal sequence number, upload)
+
+
+class UploadQueue:
+    """Write-behind queue for the labels set by the user.
+    Submissions are queued in order and flushed by a background worker,
+    which uploads the players of each submission concurrently.
+    Failed uploads are kept as messages by session (the labeler's owner) until popped
+    by the UI, so that each session is only warned of its own uploads.
+    If a 'journal' is given, uploads are journaled before being attempted and
+    acknowledged when they succeed, so that the ones left can be replayed.
+    """
+
+    def __init__(self, max_workers: int = 5, journal: Optional["LabelJournal"] = None) -> None:
+        self.journal = journal
+        self._queue: Queue[Optional[tuple[Optional[str], list[Upload]]]] = Queue()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="label-upload",
+        )
+        self._errors: dict[Optional[str], list[str]] = {}
+        self._lock = Lock()
+
+        self._worker = Thread(target=self._run, name="upload-queue", daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+
+    @property
+    def pending(self) -> int:
+        """Number of submissions that haven't been flushed yet."""
+        return self._queue.unfinished_tasks
+
+    def submit(self, labeler: "Labeler", labels: list["LabelId"]) -> None:
+        """Queue the labels of the labeler's current selection for upload."""
+        uploads = prepare_label_uploads(labeler, labels)
+        labeler.mark_uploaded()
+        self._queue.put(
+            (
+                labeler.owner,
+                self.journal.append(uploads)
+                if self.journal is not None
+                else [(None, upl) for upl in uploads],
+            )
+        )
+
+    def replay(self, batch_size: int = 64) -> int:
+        """Queue the journaled uploads that haven't succeeded yet, in batches.
+        Returns the number of uploads queued.
+        """
+        assert batch_size > 0
+        if self.journal is None:
+            return 0
+
+        pending: list["JournaledUpload"] = self.journal.pending()
+        for start in range(0, len(pending), batch_size):
+            self._queue.put((None, pending[start:start + batch_size]))
+        return len(pending)
+
+    def pop_errors(self, owner: Optional[str] = None) -> list[str]:
+        """Get and clear the error messages of the owner's failed uploads.
+        Replayed uploads have no owner.
+        """
+        with self._lock:
+            return self._errors.pop(owner, [])
+
+    def join(self) -> None:
+        """Wait until all queued submissions have been flushed."""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Flush the remaining submissions and stop the worker."""
+        if not self._worker.is_alive():
+            return
+        self._queue.put(None)
+        self._worker.join()
+        self._executor.shutdown()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._flush(*item)
+            except Exception as e:
+                # Keep the worker alive for the following submissions
+                self._record_error(item[0], f"Upload batch failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _flush(self, owner: Optional[str], uploads: list[Upload]) -> None:
+        futures = [(seq, upl, self._submit(upl)) for seq, upl in uploads]
+        for seq, upl, fut in futures:
+            try:
+                fut.result()
+                if seq is not None:
+                    self.journal.ack(seq)
+            except Exception as e:
+                self._record_error(
+                    owner,
+                    f"Upload failed for match {upl.match_id}, player {upl.player_id}: {e}"
+                )
+
+    def _submit(self, upload: "LabelUpload") -> Future:
+        """Upload in the executor, or inline if it was already shut down.
+        The executors are shut down at interpreter exit before the atexit handlers run,
+        so the submissions flushed by 'close' are uploaded inline.
+        """
+        try:
+            return self._executor.submit(put_label, upload)
+        except RuntimeError:
+            fut: Future = Future()
+            try:
+                fut.set_result(put_label(upload))
+            except Exception as e:
+                fut.set_exception(e)
+            return fut
+
+    def _record_error(self, owner: Optional[str], msg: str) -> None:
+        print(f"[ERROR] {msg}")
+        with self._lock:
+            self._errors.setdefault(owner, []).append(msg)
@@ -0,0 +1,68 @@
+"""WindowHistory class code."""
+
+from collections import deque
+from typing import TYPE_CHECKING, Optional
+
+from classes.window_lookahead import get_precond_mt, PreparedWindow
+
+if TYPE_CHECKING:
+    from dbdie_classes.base import FullModelType
+    from PIL.Image import Image
+
+    from classes.gradio import OptionsList
+    from classes.labeler import Labeler
+
+
+class WindowHistory:
+    """Ring buffer of the last labeling windows shown, with their options and rescaled crops.
+    Going back and forth over them skips rebuilding the windows, their options and images.
+    A window's labels are re-read when it's taken, and its options are dropped if the
+    labels they depend on were edited in the meantime (see 'PreparedWindow.refreshed').
+    """
+
+    def __init__(self, maxlen: int = 16) -> None:
+        assert maxlen > 0
+        self._windows: deque[tuple[tuple["FullModelType", int], PreparedWindow]] = deque(
+            maxlen=maxlen
+        )
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+    def _pop(self, key: tuple["FullModelType", int]) -> Optional[PreparedWindow]:
+        for ix, (k, window) in enumerate(self._windows):
+            if k == key:
+                del self._windows[ix]
+                return window
+        return None
+
+    def save(
+        self,
+        labeler: "Labeler",
+        options: Optional["OptionsList"],
+        images: Optional[list["Image"]],
+    ) -> None:
+        """Save the labeler's current window, as shown with 'options' and 'images'."""
+        if labeler.done or (labeler.counts.ptr_min < 0):
+            return
+
+        key = labeler.window_key(labeler.counts.ptr_min)
+        precond_mt = get_precond_mt(labeler)
+        window = PreparedWindow(
+            current=labeler.current,
+            options=options if precond_mt is not None else None,
+            precond_mt=precond_mt,
+            precond_version=(
+                labeler.label_index.version(precond_mt) if precond_mt is not None else 0
+            ),
+            images=images,
+        )
+
+        self._pop(key)
+        self._windows.append((key, window))  # the oldest one is dropped when full
+
+    def take(self, labeler: "Labeler", ptr_min: int) -> Optional[PreparedWindow]:
+        """Take the saved window that starts at the 'ptr_min' pending row, if any."""
+        key = labeler.window_key(ptr_min)
+        window = self._pop(key) if key is not None else None
+        return window.refreshed(labeler, ptr_min) if window is not None else None
@@ -0,0 +1,150 @@
+"""WindowLookahead class code."""
+
+import atexit
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from dbdie_classes.options.FMT import from_fmt
+from threading import Lock
+from typing import TYPE_CHECKING, Optional
+
+from code.fmt_correl import get_precond_fmt
+from code.labeler import build_current, refresh_labels
+from img import rescale_crop
+
+if TYPE_CHECKING:
+    from dbdie_classes.base import FullModelType, ModelType
+    from PIL.Image import Image
+
+    from classes.current_window import CurrentWindow
+    from classes.gradio import OptionsList
+    from classes.labeler import Labeler
+    from classes.labeler_selector import LabelerSelector
+
+
+def get_precond_mt(labeler: "Labeler") -> Optional["ModelType"]:
+    """Model type whose labels the labeler's options depend on, if any."""
+    precond_fmt = get_precond_fmt(labeler.mt, labeler.ifk)
+    return None if precond_fmt is None else from_fmt(precond_fmt)[0]
+
+
+@dataclass
+class PreparedWindow:
+    """Labeling window computed ahead of time."""
+
+    current         : "CurrentWindow"
+    options         : Optional["OptionsList"]  # None if they don't depend on the window
+    precond_mt      : Optional["ModelType"]  # model type the options depend on
+    precond_version : int  # version of the precond_mt labels used for the options
+    images          : Optional[list["Image"]] = field(default=None)  # rescaled crops, if kept
+
+    def refreshed(self, labeler: "Labeler", ptr_min: int) -> "PreparedWindow":
+        """Same window with its labels re-read, which starts at the 'ptr_min' pending row.
+        Its options are dropped if the labels they depend on were edited since.
+        """
+        self.current = refresh_labels(labeler, self.current, ptr_min)
+        if (self.precond_mt is not None) and (
+            labeler.label_index.version(self.precond_mt) != self.precond_version
+        ):
+            self.options = None
+        return self
+
+
+class WindowLookahead:
+    """Background computation of the next labeling windows of the current labeler.
+    While the user labels a window, the next 'depth' ones are built along with
+    their correlated options and rescaled crops.
+    A prepared window's labels are re-read when it's taken, and its options are
+    dropped if the labels they depend on were edited in the meantime.
+    """
+
+    def __init__(self, crop_w: int, depth: int = 2) -> None:
+        assert depth > 0
+        self.crop_w = crop_w
+        self.depth = depth
+
+        self._futures: dict[tuple["FullModelType", int], Future] = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lookahead")
+        self._lock = Lock()
+        atexit.register(self.close)
+
+    def _prepare(
+        self,
+        lbl_sel: "LabelerSelector",
+        labeler: "Labeler",
+        ptr_min: int,
+        key: tuple["FullModelType", int],
+    ) -> Optional[PreparedWindow]:
+        current = build_current(labeler, ptr_min)
+        if labeler.window_key(ptr_min) != key:
+            return None  # the leased rows changed meanwhile
+
+        precond_mt = get_precond_mt(labeler)
+        precond_version = (
+            labeler.label_index.version(precond_mt) if precond_mt is not None else 0
+        )
+        options = (
+            lbl_sel.get_options(labeler, current) if precond_mt is not None else None
+        )
+
+        try:
+            images = [
+                rescale_crop(path, labeler.crops.mtime_ns(path), self.crop_w)
+                if path is not None
+                else None
+                for path in labeler.get_crops("jpg", current)
+            ]
+        except OSError:
+            images = None  # it fails again, and is reported, when it's shown
+
+        return PreparedWindow(current, options, precond_mt, precond_version, images)
+
+    def schedule(self, lbl_sel: "LabelerSelector") -> None:
+        """Prepare the windows that follow the current labeler's current one."""
+        labeler = lbl_sel.labeler
+        if labeler.done:
+            return
+
+        ptrs = [
+            labeler.counts.ptr_min + k * labeler.n_players
+            for k in range(1, self.depth + 1)
+        ]
+        keys = {
+            labeler.window_key(ptr): ptr for ptr in ptrs
+            if ptr + labeler.n_players <= labeler.pending.size
+        }
+
+        with self._lock:
+            for key in list(self._futures):
+                if key not in keys:
+                    self._futures.pop(key).cancel()
+            for key, ptr in sorted(keys.items()):
+                if key not in self._futures:
+                    self._futures[key] = self._executor.submit(
+                        self._prepare, lbl_sel, labeler, ptr, key
+                    )
+
+    def take(self, labeler: "Labeler", ptr_min: int) -> Optional[PreparedWindow]:
+        """Take the prepared window that starts at the 'ptr_min' pending row, if any.
+        Waits for it if it's still being computed.
+        """
+        with self._lock:
+            fut = self._futures.pop(labeler.window_key(ptr_min), None)
+        if (fut is None) or fut.cancelled():
+            return None
+
+        try:
+            prepared = fut.result()
+        except Exception as e:
+            print(f"[WARNING] Look-ahead failed for {labeler.fmt}: {e}")
+            return None
+        if prepared is None:
+            return None
+
+        return prepared.refreshed(labeler, ptr_min)
+
+    def close(self) -> None:
+        """Stop the computations that haven't started yet."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            self._futures.clear()
+        atexit.unregister(self.close)
@@ -0,0 +1,117 @@
+"""WorkAllocator class code."""
+
+from bisect import insort
+from dataclasses import dataclass, field
+from dbdie_classes.options.FMT import from_fmt
+import numpy as np
+from threading import Lock
+from time import time
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from dbdie_classes.base import FullModelType
+
+    from classes.label_index import LabelIndex
+
+
+@dataclass(eq=False)
+class Lease:
+    """Pending rows of a fmt leased to a labeling session until 'expires_at'."""
+
+    fmt        : "FullModelType"
+    owner      : str  # labeling session
+    rows       : np.ndarray  # label row positions, whole labeling windows
+    expires_at : float  # UNIX timestamp
+    labeled    : int = field(default=0)  # number of leading rows labeled so far
+
+
+class WorkAllocator:
+    """Allocator of the pending rows of each fmt among concurrent labeling sessions.
+    Rows are handed out in chunks of 'chunk_windows' whole labeling windows, leased
+    for 'ttl' seconds and renewed by the session's activity. When a lease expires,
+    the rows that weren't labeled yet are handed out again, lowest rows first.
+    Trailing rows that don't fill a labeling window are never handed out.
+    """
+
+    def __init__(
+        self,
+        label_index: "LabelIndex",
+        chunk_windows: int = 8,
+        ttl: float = 15 * 60,
+    ) -> None:
+        assert chunk_windows > 0
+        assert ttl > 0
+        self.label_index = label_index
+        self.chunk_windows = chunk_windows
+        self.ttl = ttl
+
+        self._free: dict["FullModelType", list[np.ndarray]] = {}  # sorted by first row
+        self._leases: dict["FullModelType", list[Lease]] = {}
+        self._lock = Lock()
+
+    def _init_fmt(self, fmt: "FullModelType", n_players: int) -> None:
+        """Split the pending rows of the fmt into chunks. Must be called with the lock held."""
+        if fmt in self._free:
+            return
+
+        mt, _, ifk = from_fmt(fmt)
+        pending = self.label_index.pending(mt, ifk)
+        pending = pending[:pending.size - pending.size % n_players]
+
+        step = self.chunk_windows * n_players
+        self._free[fmt] = [pending[i:i + step] for i in range(0, pending.size, step)]
+        self._leases[fmt] = []
+
+    def _give_back(self, lease: Lease) -> None:
+        """Return the lease's unlabeled rows. Must be called with the lock held."""
+        self._leases[lease.fmt].remove(lease)
+        rest = lease.rows[lease.labeled:]
+        if rest.size > 0:
+            insort(self._free[lease.fmt], rest, key=lambda rows: rows[0])
+
+    def lease(self, fmt: "FullModelType", n_players: int, owner: str) -> Optional[Lease]:
+        """Lease the lowest free chunk of the fmt, if there's any left."""
+        now = time()
+        with self._lock:
+            self._init_fmt(fmt, n_players)
+            for lease in [ls for ls in self._leases[fmt] if ls.expires_at <= now]:
+                self._give_back(lease)
+
+            if not self._free[fmt]:
+                return None
+
+            lease = Lease(fmt, owner, self._free[fmt].pop(0), expires_at=now + self.ttl)
+            self._leases[fmt].append(lease)
+            return lease
+
+    def holds(self, lease: Lease) -> bool:
+        """Whether the lease is still held by its owner, i.e. it wasn't handed out again."""
+        with self._lock:
+            return any(ls is lease for ls in self._leases.get(lease.fmt, []))
+
+    def renew(self, owner: str) -> None:
+        """Extend the owner's leases."""
+        expires_at = time() + self.ttl
+        with self._lock:
+            for leases in self._leases.values():
+                for lease in leases:
+                    if lease.owner == owner:
+                        lease.expires_at = expires_at
+
+    def advance(self, lease: Lease, labeled: int) -> None:
+        """Record that the lease's first 'labeled' rows were labeled.
+        A fully labeled lease is finished.
+        """
+        with self._lock:
+            lease.labeled = max(lease.labeled, min(labeled, lease.rows.size))
+            if lease.labeled == lease.rows.size:
+                leases = self._leases.get(lease.fmt, [])
+                if any(ls is lease for ls in leases):
+                    leases.remove(lease)
+
+    def release(self, owner: str) -> None:
+        """Return the unlabeled rows of all the owner's leases."""
+        with self._lock:
+            for leases in list(self._leases.values()):
+                for lease in [ls for ls in leases if ls.owner == owner]:
+                    self._give_back(lease)
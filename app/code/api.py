@@ -1,7 +1,10 @@
 """Extra code for the 'api' Python file."""
 
+from dbdie_classes.options.MODEL_TYPE import TO_ID_NAMES
 from typing import TYPE_CHECKING, Union
 
+from classes.label_upload import LabelUpload
+
 if TYPE_CHECKING:
     from dbdie_classes.base import LabelId, MatchId, PlayerId
     from numpy import ndarray
@@ -20,3 +23,33 @@ def extract_player_info(
         else [int(v) for v in player_labels]
     )
     return match_id, player_id, player_labels
+
+
+def prepare_label_uploads(labeler, labels: list["LabelId"]) -> list[LabelUpload]:
+    """Update the labeler's current labels and split them in per-player uploads."""
+    if labeler.current.labels != labels:
+        labeler.update_current(labels)
+        print("Labels updated.")
+
+    labels_wrapped = labeler.wrap(labels)
+
+    uploads = []
+    for player_ix in range(labeler.n_players):
+        match_id, player_id, player_labels = extract_player_info(
+            labeler,
+            labels_wrapped,
+            player_ix,
+        )
+        uploads.append(
+            LabelUpload(
+                match_id=match_id,
+                player_id=player_id,
+                id_name=TO_ID_NAMES[labeler.mt],
+                labels=(
+                    tuple(player_labels)
+                    if isinstance(player_labels, list)
+                    else player_labels
+                ),
+            )
+        )
+    return uploads
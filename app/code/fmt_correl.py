@@ -7,23 +7,36 @@ from dbdie_classes.options.FMT import from_fmt
 from dbdie_classes.options.NULL_IDS import mt_is_null
 from dbdie_classes.options.NULL_IDS import BY_MT as NULL_IDS_BY_MT
 import pandas as pd
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
-from paths import load_predictable_csv
+from classes.correlation_table import CorrelationTable
+from classes.predictables_catalog import get_predictables
+from paths import get_predictable_csv_path
 
 if TYPE_CHECKING:
-    from dbdie_classes.base import FullModelType, IsForKiller, ModelType
+    from dbdie_classes.base import FullModelType, IsForKiller, ModelType, Path
 
+    from classes.current_window import CurrentWindow
     from classes.gradio import Options, OptionsList
 
 
-def base_options(options: pd.DataFrame) -> "Options":
-    return options.str_value.to_list()
+def option_labels(
+    options: pd.DataFrame,
+    id_col: str = "id",
+    emoji: bool = True,
+) -> "Options":
+    """Build the options' (ui name, id) pairs, with vectorized string operations."""
+    names = options["name"].astype(str)
+    if emoji:
+        names = options["emoji"].astype(str) + " " + names
+    return list(zip(names.to_list(), options[id_col].to_list()))
 
 
-def base_options_list(options: pd.DataFrame, labeler) -> "OptionsList":
-    """Get base options, provided that there is no defined correlation between FMTs."""
-    return [base_options(options) for _ in range(labeler.total_cells)]
+def base_options_list(base_opts: "Options", labeler) -> "OptionsList":
+    """Get base options, provided that there is no defined correlation between FMTs.
+    All cells share the same list, which must not be modified.
+    """
+    return [base_opts] * labeler.total_cells
 
 
 def get_fmt_correlation_dict(mt: "ModelType", ifk: "IsForKiller") -> dict[str, bool]:
@@ -34,6 +47,17 @@ def get_fmt_correlation_dict(mt: "ModelType", ifk: "IsForKiller") -> dict[str, b
     }
 
 
+def get_precond_fmt(mt: "ModelType", ifk: "IsForKiller") -> Optional["FullModelType"]:
+    """Get the full model type whose labels condition the options, if any."""
+    conds = get_fmt_correlation_dict(mt, ifk)
+    if conds["killer character"] or conds["killer addons"]:
+        return KILLER_FMT.ITEM
+    elif conds["surv addons"]:
+        return SURV_FMT.ITEM
+    else:
+        return None
+
+
 def get_item_id_col(fmt: "FullModelType") -> str:
     """Get item id column belonging to the full model type."""
     if fmt == KILLER_FMT.CHARACTER:
@@ -50,28 +74,30 @@ def load_df_corr(
     fmt: "FullModelType",
     mt: "ModelType",
     item_id_col: str,
-    precond_ids,
 ) -> pd.DataFrame:
-    df, _ = load_predictable_csv(
-        fmt,
-        usecols=(
+    """Load the fmt's options that have a precondition id.
+    Characters' options are labeled with their base character id, so it's loaded too.
+    """
+    df = get_predictables().predictable(fmt).cols(
+        (
             ["id", "rarity_id", "name", item_id_col]
             if mt in MT.WITH_TYPES
             else ["id", "emoji", "name", item_id_col]
-        ),
+        )
+        + (["base_char_id"] if mt == MT.CHARACTER else [])
     )
     assert not df.empty
 
     df = df[df[item_id_col].notnull()].astype({item_id_col: int})
     assert not df.empty
 
-    return df[df[item_id_col].isin(precond_ids)]
+    return df
 
 
 def merge_predictable_rarity(df: pd.DataFrame, mt: "ModelType") -> pd.DataFrame:
     """Merge predictable rarity."""
     if mt in MT.WITH_TYPES:
-        df_rarity, _ = load_predictable_csv("rarity", usecols=["id", "emoji"])
+        df_rarity = get_predictables().rarity().cols(["id", "emoji"])
         df_rarity = df_rarity.rename({"id": "rarity_id"}, axis=1)
         df = pd.merge(df, df_rarity, on="rarity_id", how="left")
         df = df.sort_values(["rarity_id", "name"])
@@ -87,105 +113,97 @@ def preprend_null(
     item_id_col: str,
     uniqueness: bool,
 ) -> pd.DataFrame:
-    df = pd.concat(
-        (
-            pd.DataFrame(
-                [
-                    [
-                        labeler.null_id,
-                        labeler.null_name,
-                        NULL_IDS_BY_MT[mt][int(ifk)],
-                        "❌",
-                    ]
-                ],
-                columns=["id", "name", "item_id", "emoji"],
-            ),
-            df,
-        ),
-        axis=0,
-        ignore_index=True,
-    )
+    null_row = {
+        "id": labeler.null_id,
+        "name": labeler.null_name,
+        "item_id": NULL_IDS_BY_MT[mt][int(ifk)],
+        "emoji": "❌",
+    }
+    if mt == MT.CHARACTER:
+        null_row["base_char_id"] = labeler.null_id
+
+    df = pd.concat((pd.DataFrame([null_row]), df), axis=0, ignore_index=True)
     return df.set_index(item_id_col, drop=True, verify_integrity=uniqueness)
 
 
-def unique_ui_name(df: pd.DataFrame, pc_val) -> "Options":
-    """Unique function for return_corr_options."""
-    try:
-        return [df.at[int(pc_val), "ui_name"]]
-    except KeyError:
-        return [df["ui_name"].iat[0]]
+def build_corr_table(
+    labeler,
+    precond_fmt: "FullModelType",
+    uniqueness: bool = False,
+) -> CorrelationTable:
+    """Build the table of the labeler's options for each precondition id.
+    If 'uniqueness', each precondition id has a single option,
+    else its options go after the null option.
+    """
+    fmt = labeler.fmt
+    mt, _, ifk = from_fmt(fmt)
+    item_id_col = get_item_id_col(fmt)
+
+    df = load_df_corr(fmt, mt, item_id_col)
+    df = merge_predictable_rarity(df, mt)
+    df = preprend_null(df, labeler, mt, ifk, item_id_col, uniqueness)
+
+    id_col = "base_char_id" if mt == MT.CHARACTER else "id"
+    ui_names = option_labels(df, id_col)
+    null_opts = ui_names[0:1]
 
+    by_precond: dict[int, "Options"] = {}
+    for pc_val, ui_name in zip(df.index[1:].to_list(), ui_names[1:]):
+        by_precond.setdefault(int(pc_val), [] if uniqueness else list(null_opts))
+        by_precond[int(pc_val)].append(ui_name)
 
-def not_unique_ui_name(df: pd.DataFrame, pc_val) -> "Options":
-    """Not unique function for return_corr_options."""
-    return (
-        (
-            [df["ui_name"].iat[0]] + df.loc[int(pc_val), "ui_name"].to_list()
-        )
-        if int(pc_val) in df.index.values
-        else [df["ui_name"].iat[0]]
+    return CorrelationTable(
+        precond_mt=from_fmt(precond_fmt)[0],
+        types=fmt == SURV_FMT.ADDONS,
+        null_opts=null_opts,
+        by_precond=by_precond,
     )
 
 
-def return_corr_options(
-    df: pd.DataFrame,
-    mask_precond: pd.Series,
-    precond_data: pd.Series,
-    uniqueness: bool,
-    base_opts: "Options",
-) -> "OptionsList":
-    """Return set FMTs correlation options."""
-    ui_name_func = unique_ui_name if uniqueness else not_unique_ui_name
-    return [
-        ui_name_func(df, pc_val) if pc else base_opts
-        for pc, pc_val in zip(mask_precond, precond_data)
-    ]
+def get_corr_paths(fmt: "FullModelType") -> list["Path"]:
+    """Get paths of the cached CSVs that the fmt's correlation table is built from."""
+    mt, _, _ = from_fmt(fmt)
+    return [get_predictable_csv_path(fmt, is_type=False)] + (
+        [get_predictable_csv_path("rarity", is_type=False)]
+        if mt in MT.WITH_TYPES
+        else []
+    )
 
 
 # * Higher level function
 
 
 def correlated_options(
-    options: pd.DataFrame,
+    base_opts: "Options",
+    table: CorrelationTable,
     labeler,
-    fmt: "FullModelType",
     precond_fmt: "FullModelType",
-    uniqueness: bool,
+    current: Optional["CurrentWindow"] = None,
 ) -> "OptionsList":
-    """Get options when there is a defined correlation between FMTs."""
-    mt, _, ifk = from_fmt(fmt)
-    precond_mt, _, _ = from_fmt(precond_fmt)
-
+    """Get options when there is a defined correlation between FMTs.
+    They're computed for the 'current' window, or for the labeler's if it's None,
+    by looking up each cell's precondition id in the fmt's correlation 'table'.
+    """
     precond_data: pd.Series = labeler.filter_fmt_with_current(
         precond_fmt,
-        types=fmt == SURV_FMT.ADDONS,
+        types=table.types,
+        current=current,
     )
-    mask_precond = ~mt_is_null(precond_data, precond_mt)
+    mask_precond = ~mt_is_null(precond_data, table.precond_mt)
     if not mask_precond.any():
-        return base_options_list(options, labeler)
+        return base_options_list(base_opts, labeler)
 
-    item_id_col = get_item_id_col(fmt)
-    precond_ids = precond_data[mask_precond].astype(int).unique()
+    precond_ids = [
+        int(pc_val) if pc else None
+        for pc, pc_val in zip(mask_precond.to_list(), precond_data.to_list())
+    ]
 
     # We take into account that there are some items without addons (for example)
     # Useful for when ALL items are null
-    df = load_df_corr(fmt, mt, item_id_col, precond_ids)
-    if df.empty:
-        return base_options_list(options, labeler)
-
-    df = merge_predictable_rarity(df, mt)
-    df = preprend_null(df, labeler, mt, ifk, item_id_col, uniqueness)
+    if not any(pc_id in table.by_precond for pc_id in precond_ids if pc_id is not None):
+        return base_options_list(base_opts, labeler)
 
-    id_col = "base_char_id" if mt == MT.CHARACTER else "id"
-    df["ui_name"] = df.apply(
-        lambda row: (row["emoji"] + " " + row["name"], row[id_col]),
-        axis=1,
-    )
-
-    return return_corr_options(
-        df,
-        mask_precond,
-        precond_data,
-        uniqueness,
-        base_opts=base_options(options),
-    )
+    return [
+        table.by_precond.get(pc_id, table.null_opts) if pc_id is not None else base_opts
+        for pc_id in precond_ids
+    ]
@@ -5,22 +5,21 @@ from dbdie_classes.options.NULL_IDS import INT_IDS as NULL_INT_IDS
 from dbdie_classes.options.SQL_COLS import MT_TO_COLS
 import numpy as np
 import pandas as pd
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING
 
-from paths import load_predictable_csv
+from classes.current_window import CurrentWindow
+from classes.predictables_catalog import get_predictables
 
 if TYPE_CHECKING:
     from dbdie_classes.base import (
         FullModelType,
         IsForKiller,
-        LabelsDataFrame,
         LabelId,
         LabelName,
         ModelType,
-        PlayerId,
     )
 
-    from classes.base import CurrentDataFrame
+    from classes.label_index import LabelIndex
 
 TOTAL_CELLS = 16
 
@@ -49,26 +48,21 @@ def init_current(
     n_items: int,
     mt: "ModelType",
     ifk: "IsForKiller",
-) -> tuple["CurrentDataFrame", "LabelId", "LabelName"]:
+) -> tuple[CurrentWindow, "LabelId", "LabelName"]:
     """Initialize current information. Also return fmt's null id."""
     null_id = NULL_INT_IDS[mt][int(ifk)]
 
     minus_one_vals = np.full(total_cells, -1)
     empty_str_vals = np.full(total_cells, "")
     return (
-        pd.DataFrame(
-            {
-                "m_id": np.copy(minus_one_vals),
-                "m_filename": np.copy(empty_str_vals),
-                "m_match_date": np.copy(empty_str_vals),
-                "m_dbdv_id": np.copy(minus_one_vals),
-                "label_id": np.full(total_cells, null_id),
-                "player_id": np.copy(minus_one_vals),
-                "item_id": np.fromiter(
-                    ((i % n_items) for i in range(total_cells)),
-                    dtype=int,
-                ),
-            }
+        CurrentWindow(
+            m_id=np.copy(minus_one_vals),
+            m_filename=np.copy(empty_str_vals),
+            m_match_date=np.copy(empty_str_vals),
+            m_dbdv_id=np.copy(minus_one_vals),
+            label_id=np.full(total_cells, null_id),
+            player_id=np.copy(minus_one_vals),
+            item_id=np.arange(total_cells) % n_items,
         ),
         null_id,
         (
@@ -80,7 +74,7 @@ def init_current(
 
 
 def init_pending(
-    labels: pd.DataFrame,
+    label_index: "LabelIndex",
     mt: "ModelType",
     ifk: "IsForKiller",
 ) -> tuple[np.ndarray, int]:
@@ -95,125 +89,105 @@ def init_pending(
     If pending is 0, labeling was totally completed (though the 'done'
         condition depends on allowing partial labeling or not).
     """
-    pt_mask = labels.index.get_level_values(1) == 4
-    if not ifk:
-        pt_mask = np.logical_not(pt_mask)
-    mask = np.logical_and(pt_mask, ~labels[f"{mt}_mckd"])
-    return np.nonzero(mask)[0], int(pt_mask.sum())
+    return label_index.pending(mt, ifk), int(label_index.partition(ifk).size)
 
 
 # * Smaller functions
 
+MATCH_COLS = ["filename", "match_date", "dbdv_id"]
 
-def process_labels_and_players(
-    lbl,
-    current_labels: pd.DataFrame,
-) -> tuple[list[Optional["LabelId"]], list["PlayerId"]]:
-    """Process labels and players function for 'update_current'."""
-    return (
-        sum(
-            (
-                [row[c] for c in lbl.columns]
-                for _, row in current_labels.iterrows()
-            ),
-            [],
-        ),
-        sum(
-            (
-                [pl_id for _ in lbl.columns]
-                for pl_id in current_labels.index.get_level_values(1).values
-            ),
-            [],
+
+def init_match_arrays(matches: pd.DataFrame) -> tuple[pd.Index, dict[str, np.ndarray]]:
+    """Initialize the matches' index and column arrays for positional lookups."""
+    return matches.index, {
+        c: (
+            matches[c].to_numpy(dtype=np.int64, na_value=-1)
+            if pd.api.types.is_numeric_dtype(matches[c])
+            else matches[c].to_numpy()
         )
-    )
+        for c in MATCH_COLS
+    }
 
 
-def process_matches(
-    lbl,
-    current_labels: pd.DataFrame,
-    update_match: bool,
-) -> pd.DataFrame:
-    """Process matches function for 'update_current'."""
-    m_cols = ["filename", "match_date", "dbdv_id"]
-    m_cols_ext = ["id"] + m_cols
-
-    if update_match:
-        match_ids = sum(
-            (
-                [mid for _ in lbl.columns]
-                for mid in current_labels.index.get_level_values(0).values
-            ),
-            [],
+def process_labels_and_players(lbl, ptrs: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Process labels and players function for 'update_current'.
+    Labels are flattened player by player, with missing ones set to the null id.
+    """
+    with lbl.label_index.write_lock:  # labels are edited by concurrent sessions
+        labels = lbl.labels.iloc[ptrs, lbl.column_ixs].to_numpy(
+            dtype=np.int64,
+            na_value=lbl.null_id,
         )
-        c_matches: pd.DataFrame = lbl.matches[m_cols].loc[match_ids]
-        c_matches = c_matches.reset_index(drop=False)
-        c_matches = c_matches.rename({c: f"m_{c}" for c in m_cols_ext}, axis=1)
-    else:
-        c_matches = lbl.current[[f"m_{c}" for c in m_cols_ext]]
+    players = np.repeat(lbl.label_index.player_ids[ptrs], lbl.n_items)
+    return labels.ravel(), players
 
-    return c_matches
 
+def process_matches(lbl, ptrs: np.ndarray) -> dict[str, np.ndarray]:
+    """Process matches function for 'update_current'."""
+    match_ids = np.repeat(lbl.label_index.match_ids[ptrs], lbl.n_items)
+    match_ixs = lbl.match_index.get_indexer(match_ids)
+    assert (match_ixs >= 0).all(), "Labels of matches that don't exist"
+    return {"m_id": match_ids} | {
+        f"m_{c}": values[match_ixs] for c, values in lbl.match_arrays.items()
+    }
 
-# * Functions
 
+# * Functions
 
-def update_current(lbl, update_match: bool) -> "CurrentDataFrame":
-    """Update current information."""
-    ptrs = lbl.pending[lbl.counts.ptr_min:lbl.counts.ptr_max]
-    c_labels: pd.DataFrame = lbl.labels.iloc[ptrs, lbl.column_ixs]
 
-    labels, players = process_labels_and_players(lbl, c_labels)
-    c_matches = process_matches(lbl, c_labels, update_match)
+def build_current(lbl, ptr_min: int) -> CurrentWindow:
+    """Build the labeling window that starts at the 'ptr_min' pending row."""
+    ptrs = lbl.pending[ptr_min:ptr_min + lbl.n_players]
 
-    return pd.concat(
-        (
-            c_matches,
-            pd.Series(labels, name="label_id").fillna(lbl.null_id).astype(int),
-            pd.Series(players, name="player_id"),
-            lbl.current["item_id"],
-        ),
-        axis=1,
+    labels, players = process_labels_and_players(lbl, ptrs)
+    return CurrentWindow(
+        **process_matches(lbl, ptrs),
+        label_id=labels,
+        player_id=players,
+        item_id=lbl.item_ids,
     )
 
 
+def refresh_labels(lbl, window: CurrentWindow, ptr_min: int) -> CurrentWindow:
+    """Re-read the label ids of the window that starts at the 'ptr_min' pending row."""
+    labels, _ = process_labels_and_players(lbl, lbl.pending[ptr_min:ptr_min + lbl.n_players])
+    return window.with_labels(labels)
+
+
+def update_current(lbl, update_match: bool) -> CurrentWindow:
+    """Update current information.
+    If 'update_match' is False, only the label ids are updated.
+    """
+    if not update_match:
+        return refresh_labels(lbl, lbl.current, lbl.counts.ptr_min)
+    return build_current(lbl, lbl.counts.ptr_min)
+
+
 # * Other predictables
 
 
-def prefilter_data(
-    labels: "LabelsDataFrame",
+def filter_data(
+    label_index: "LabelIndex",
     mt: "ModelType",
-    ifk: "IsForKiller",
-) -> pd.Series:
-    """Filter data so as to make the index filtering more efficient."""
-    if ifk is None:
-        return labels[mt]
-    else:
-        mask_ifk = labels.index.get_level_values(1) == 4
-        if not ifk:
-            mask_ifk = np.logical_not(mask_ifk)
-        return labels[mt][mask_ifk]
-
-
-def filter_data(data: pd.Series, current: "CurrentDataFrame") -> pd.Series:
-    keys = current[["m_id", "player_id"]].apply(
-        lambda row: (row["m_id"], row["player_id"]),
-        axis=1,
-    )
-    result = data.loc[keys]
-    return result.astype(int)
+    current: CurrentWindow,
+) -> np.ndarray:
+    """Get the model type's labels of the current cells' (match_id, player_id) keys."""
+    positions = label_index.positions_of(current.m_id, current.player_id)
+    with label_index.write_lock:  # labels are edited by concurrent sessions
+        return label_index.labels[mt].iloc[positions].to_numpy(dtype=np.int64)
+
+
+def load_type_ids(fmt: "FullModelType") -> pd.Series:
+    """Load the type_id of each of the fmt's predictables, indexed by id."""
+    return get_predictables().predictable(fmt).index("id")["type_id"]
 
 
 def merge_with_types(
-    result: pd.Series,
+    result: np.ndarray,
     types: bool,
     fmt: "FullModelType",
     mt: "ModelType",
 ) -> pd.Series:
     if types:
-        df_types, _ = load_predictable_csv(fmt, usecols=["id", "type_id"])
-        df_types = df_types.rename({"id": mt}, axis=1)
-        result = pd.merge(result, df_types, how="left", on=mt)
-        result = result.drop(mt, axis=1)
-        result = result.rename({"type_id": mt}, axis=1)
-        result = result[mt]
-    return result
+        result = load_type_ids(fmt).reindex(result).to_numpy(dtype=np.float64, na_value=np.nan)
+    return pd.Series(result, name=mt)
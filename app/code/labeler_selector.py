@@ -1,44 +1,46 @@
 """Labeler selector extra code."""
 
 from dbdie_classes.options import PLAYER_TYPE as PT
-from dbdie_classes.options import KILLER_FMT
 from dbdie_classes.options import MODEL_TYPE as MT
-from dbdie_classes.options import SURV_FMT
 from dbdie_classes.options.FMT import to_fmt
 from dbdie_classes.options.NULL_IDS import BY_MT as NULL_IDS_BY_MT
 import pandas as pd
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 from code.fmt_correl import (
     base_options_list,
     correlated_options,
-    get_fmt_correlation_dict,
+    get_precond_fmt,
+    option_labels,
 )
 from configs.dropdown import MOST_USED
-from paths import load_predictable_csv, load_types_csv
+from classes.predictables_catalog import get_predictables
+from paths import get_predictable_csv_path
 
 if TYPE_CHECKING:
     from dbdie_classes.base import (
         IsForKiller,
         ModelType,
+        Path,
         PlayerType,
     )
 
-    from classes.gradio import OptionsList
+    from classes.correlation_table import CorrelationTable
+    from classes.current_window import CurrentWindow
+    from classes.gradio import Options, OptionsList
 
 # * Add types functions
 
 
 def merge_ifk(mt: "ModelType", options: pd.DataFrame) -> pd.DataFrame:
-    options_types, _ = load_types_csv(mt, usecols=["id", "ifk"])
+    options_types = get_predictables().types(mt).cols(["id", "ifk"])
     options_types = options_types.rename({"id": "type_id"}, axis=1)
     return pd.merge(options, options_types, how="left", on="type_id")
 
 
 def merge_killer_emojis(merged_opt: pd.DataFrame) -> pd.DataFrame:
-    killer_emojis, _ = load_predictable_csv(
-        to_fmt(MT.CHARACTER, True),
-        usecols=["power_id", "emoji", "id", "base_char_id"],
+    killer_emojis = get_predictables().predictable(to_fmt(MT.CHARACTER, True)).cols(
+        ["power_id", "emoji", "id", "base_char_id"]
     )
     killer_emojis = killer_emojis[killer_emojis["id"] == killer_emojis["base_char_id"]]
     killer_emojis = killer_emojis.drop(["id", "base_char_id"], axis=1)
@@ -56,7 +58,7 @@ def add_types(options: pd.DataFrame, mt: "ModelType", ifk: "IsForKiller") -> pd.
         merged_opt = merge_ifk(mt, options)
         merged_opt = merge_killer_emojis(merged_opt)
     else:
-        options_types, _ = load_types_csv(mt, usecols=["id", "emoji", "ifk"])
+        options_types = get_predictables().types(mt).cols(["id", "emoji", "ifk"])
         options_types = options_types.rename({"id": "type_id"}, axis=1)
         merged_opt = pd.merge(options, options_types, how="left", on="type_id")
 
@@ -130,42 +132,48 @@ def reorder_lu_and_np(
 
 
 def filter_correlated_mts(
-    options: pd.DataFrame,
+    base_opts: "Options",
+    corr_table: Optional["CorrelationTable"],
     mt: "ModelType",
     ifk: "IsForKiller",
     labeler,
+    current: Optional["CurrentWindow"] = None,
 ) -> "OptionsList":
-    conds = get_fmt_correlation_dict(mt, ifk)
-    if not any(conds.values()):
-        return base_options_list(options, labeler)
-
-    fmt = to_fmt(mt, ifk)
-
     # If item is filled, set characters (base and legendaries)
     # OR if item is filled, set addons
-    if conds["killer character"] or conds["killer addons"]:
-        return correlated_options(
-            options, labeler, fmt, precond_fmt=KILLER_FMT.ITEM, uniqueness=False
-        )
-    elif conds["surv addons"]:  # if item is filled, set addons
-        return correlated_options(
-            options, labeler, fmt, precond_fmt=SURV_FMT.ITEM, uniqueness=False
-        )
-    else:
-        raise Exception("Correlation MT condition not mapped by the ifs.")
+    precond_fmt = get_precond_fmt(mt, ifk)
+    if precond_fmt is None:
+        return base_options_list(base_opts, labeler)
+
+    assert corr_table is not None
+    return correlated_options(
+        base_opts,
+        corr_table,
+        labeler,
+        precond_fmt=precond_fmt,
+        current=current,
+    )
 
 
-# * Main options functions
+# * Base options functions
+
+
+def get_options_paths(mt: "ModelType", ifk: "IsForKiller") -> list["Path"]:
+    """Get paths of the cached CSVs that the fmt's base options are built from."""
+    paths = [get_predictable_csv_path(to_fmt(mt, ifk), is_type=False)]
+    if mt in MT.WITH_TYPES:
+        paths.append(get_predictable_csv_path(mt, is_type=True))
+        if (mt == MT.ITEM) and ifk:
+            paths.append(get_predictable_csv_path(to_fmt(MT.CHARACTER, True), is_type=False))
+    return paths
 
 
-def options_with_types(labeler) -> "OptionsList":
-    """Get current labeler's options if the model type item has item types."""
-    mt = labeler.mt
-    ifk = labeler.ifk
+def build_options_with_types(mt: "ModelType", ifk: "IsForKiller") -> "Options":
+    """Build the fmt's base options if the model type item has item types."""
     pt = PT.ifk_to_pt(ifk)
 
     # Options as DataFrame
-    options, _ = load_predictable_csv(to_fmt(mt, ifk), usecols=["name", "id", "type_id"])
+    options = get_predictables().predictable(to_fmt(mt, ifk)).cols(["name", "id", "type_id"])
     options, mt_null_col = filter_nulls(options, mt, ifk)
 
     options = add_types(options, mt, ifk)
@@ -174,35 +182,51 @@ def options_with_types(labeler) -> "OptionsList":
     options = reorder_mu(options, mt, pt, mt_null_col)
     options = reorder_lu_and_np(options, mt, ifk)
 
-    options["str_value"] = options.apply(
-        lambda row: (f"{row['emoji']} {row['name']}", row["id"]),
-        axis=1,
+    return option_labels(options)
+
+
+def build_options_wo_types(mt: "ModelType", ifk: "IsForKiller") -> "Options":
+    """Build the fmt's base options if the model type item doesn't have item types."""
+    table = get_predictables().predictable(to_fmt(mt, ifk))
+
+    try:
+        return option_labels(table.cols(["emoji", "name", "id"]))
+    except KeyError:
+        return option_labels(table.cols(["name", "id"]), emoji=False)
+
+
+def build_base_options(mt: "ModelType", ifk: "IsForKiller") -> "Options":
+    """Build the fmt's base options, i.e. before any correlation between FMTs."""
+    return (
+        build_options_with_types(mt, ifk)
+        if mt in MT.WITH_TYPES
+        else build_options_wo_types(mt, ifk)
     )
-    options = options.drop("emoji", axis=1)
 
-    # Options as list[DataFrame]
-    return filter_correlated_mts(options, mt, ifk, labeler)
 
+# * Main options functions
 
-def options_wo_types(
+
+def options_with_types(
     labeler,
-    mt: "ModelType",
-    ifk: "IsForKiller",
+    base_opts: "Options",
+    corr_table: Optional["CorrelationTable"],
+    current: Optional["CurrentWindow"] = None,
 ) -> "OptionsList":
-    """Get current labeler's options if the model type item doesn't have item types."""
-    fmt = to_fmt(mt, ifk)
+    """Get current labeler's options if the model type item has item types.
+    Correlated options are computed for the 'current' window, or for the labeler's
+    if it's None.
+    """
+    return filter_correlated_mts(
+        base_opts,
+        corr_table,
+        labeler.mt,
+        labeler.ifk,
+        labeler,
+        current,
+    )
 
-    try:
-        options, _ = load_predictable_csv(fmt, usecols=["emoji", "name", "id"])
-        options["str_value"] = options.apply(
-            lambda row: (f"{row['emoji']} {row['name']}", row["id"]),
-            axis=1,
-        )
-    except (KeyError, ValueError):
-        options, _ = load_predictable_csv(fmt, usecols=["name", "id"])
-        options["str_value"] = options.apply(
-            lambda row: (f"{row['name']}", row["id"]),
-            axis=1,
-        )
 
-    return base_options_list(options, labeler)
+def options_wo_types(labeler, base_opts: "Options") -> "OptionsList":
+    """Get current labeler's options if the model type item doesn't have item types."""
+    return base_options_list(base_opts, labeler)
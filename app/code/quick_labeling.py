@@ -5,11 +5,14 @@ from dbdie_classes.options.MODEL_TYPE import ALL_MULTIPLE_CHOICE as ALL_MT
 import gradio as gr
 from typing import Any, Optional, TYPE_CHECKING
 
-from api import upload_labels
-from img import rescale_img
+from constants import CROP_W
+from img import rescale_crop
 
 if TYPE_CHECKING:
     from dbdie_classes.base import Filename, LabelId, MatchId, Path
+    from PIL.Image import Image
+
+    from classes.upload_queue import UploadQueue
 
 GradioUpdate = dict[str, Any]
 
@@ -30,12 +33,13 @@ def process_fmt(lbl_sel, input_data) -> None:
 
 def update_data(
     lbl_selector,
+    upload_queue: "UploadQueue",
     input_data,
     upload: bool,
     go_back: bool,
 ) -> list["LabelId"]:
     if upload:
-        upload_labels(
+        upload_queue.submit(
             lbl_selector.labeler,
             list(input_data[:lbl_selector.labeler.total_cells]),
         )
@@ -44,7 +48,7 @@ def update_data(
         return lbl_selector.next(go_back=True)  # can include load
     else:
         lbl_selector.corr_driven_load()
-        return lbl_selector.labeler.current["label_id"].to_list()
+        return lbl_selector.labeler.current.labels
 
 
 def next_info(
@@ -55,7 +59,7 @@ def next_info(
         return (
             labeler.get_crops("jpg"),
             updated_data,
-            labeler.current["m_id"][0],  # TODO: Change
+            int(labeler.current.m_id[0]),  # TODO: Change
             labeler.filename(0),  # TODO: Change
         )
     else:
@@ -68,18 +72,32 @@ def next_info(
         )
 
 
-def update_images(
+def render_crops(
+    lbl_sel,
     crops: list[Optional["Path"]],
+) -> list[Optional["Image"]]:
+    """Rescale the crops of the current window, unless they were kept by the selector."""
+    if lbl_sel.images is None:
+        crop_index = lbl_sel.labeler.crops
+        lbl_sel.images = [
+            rescale_crop(img, crop_index.mtime_ns(img), CROP_W) if isinstance(img, str) else None
+            for img in crops
+        ]
+    return lbl_sel.images
+
+
+def update_images(
+    images: list[Optional["Image"]],
 ) -> list[GradioUpdate]:
     """Update Gradio predictable images."""
     return [
         gr.update(
-            value=rescale_img(img, 120) if isinstance(img, str) else None,
+            value=img,
             interactive=False,
             height="11em",
             container=False,
         )
-        for img in crops
+        for img in images
     ]
 
 
@@ -102,13 +120,13 @@ def update_match_markdown(labeler) -> list[GradioUpdate]:
     if labeler.done:
         text = ""
     else:
-        curr = labeler.current.iloc[0]
+        curr = labeler.current
         text = (
             "<br>".join(
                 [
-                    f"🖼️ ({curr['m_id']}) {curr['m_filename']}",
-                    f"📅 {curr['m_match_date']}",
-                    f"🆚 {curr['m_dbdv_id']}",
+                    f"🖼️ ({curr.m_id[0]}) {curr.m_filename[0]}",
+                    f"📅 {curr.m_match_date[0]}",
+                    f"🆚 {curr.m_dbdv_id[0]}",
                 ]  # TODO: Change
             )
             if not labeler.done
@@ -117,6 +135,12 @@ def update_match_markdown(labeler) -> list[GradioUpdate]:
     return [gr.update(value=text)]
 
 
+def warn_upload_errors(upload_queue: "UploadQueue", owner: Optional[str]) -> None:
+    """Show the owner session's failed uploads of the background queue as Gradio warnings."""
+    for msg in upload_queue.pop_errors(owner):
+        gr.Warning(msg)
+
+
 def toggle_rows_visibility(done: bool) -> list[GradioUpdate]:
     return [
         gr.update(visible=done),  # note row
@@ -3,27 +3,30 @@
 from typing import TYPE_CHECKING, Union
 
 import gradio as gr
-import requests
 
-from api import endp, from_resp_to_image
 from img import rescale_img
 from code.quick_labeling import (
     next_info,
     process_fmt,
     process_tc_info,
+    render_crops,
     toggle_rows_visibility,
     update_data,
     update_dropdowns,
     update_images,
     update_match_markdown,
+    warn_upload_errors,
 )
 
 if TYPE_CHECKING:
     from classes.gradio import (
         DropdownDict, ImageBox, ImageDict, LabeledImages, OptionsList
     )
+    from classes.image_prefetcher import ImagePrefetcher
     from classes.labeler import Labeler
     from classes.labeler_selector import LabelerSelector
+    from classes.session_registry import SessionRegistry
+    from classes.upload_queue import UploadQueue
 
 
 def images_box(options: "OptionsList", w: int) -> "ImageBox":
@@ -78,7 +81,9 @@ def empty_fn(*input_data):
 
 
 def make_label_fn(
-    lbl_sel: "LabelerSelector",
+    sessions: "SessionRegistry",
+    upload_queue: "UploadQueue",
+    img_prefetcher: "ImagePrefetcher",
     upload: bool,
     go_back: bool = False,
 ):
@@ -86,15 +91,24 @@ def make_label_fn(
 
     upload: Toggles the upload and the changing of the labels for the following ones.
         If false, it's useful for synching when refreshing.
+        Uploads are queued and flushed in the background by 'upload_queue'.
+    Match images are served by 'img_prefetcher', which fetches the upcoming ones
+        in the background after each call.
+    Each UI session labels with its own LabelerSelector, taken from 'sessions'.
     """
     if go_back:
         assert not upload, "You can't upload labels when going backwards"
 
-    def label_fn(*input_data):
+    def label_fn(request: gr.Request, *input_data):
         """Main label function. Also used for synching objects when refreshing.
         
         Flattened input: First 16 images, and then 16 dropdowns.
         """
+        lbl_sel = sessions.get(request.session_hash)
+        with lbl_sel.lock:
+            return session_label_fn(lbl_sel, *input_data)
+
+    def session_label_fn(lbl_sel: "LabelerSelector", *input_data):
         print(f"PROCESSING {lbl_sel.fmt}...")
         assert len(input_data) == lbl_sel.labeler.total_cells + 2
 
@@ -103,22 +117,24 @@ def make_label_fn(
         # Select new current labeler
         labeler = lbl_sel.labeler
 
-        updated_data = update_data(lbl_sel, input_data, upload, go_back)
+        updated_data = update_data(lbl_sel, upload_queue, input_data, upload, go_back)
         crops, updated_data, match_id, match_filename = next_info(labeler, updated_data)
         match_img = (
-            from_resp_to_image(requests.get(endp(f"/matches/image/{match_id}")))
+            img_prefetcher.get(match_id)
             if match_id is not None
             else None
         )
+        img_prefetcher.prefetch(labeler)
 
         if match_filename is not None:
             print("Main match:", match_filename)
             print(30 * "-")
 
         print(f"PROCESSED {lbl_sel.fmt}.")
+        warn_upload_errors(upload_queue, labeler.owner)
 
         return (
-            update_images(crops)
+            update_images(render_crops(lbl_sel, crops))
             + update_dropdowns(lbl_sel, updated_data)
             + [gr.update(value=match_img)]
             + update_match_markdown(labeler)
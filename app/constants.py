@@ -1,3 +1,5 @@
 """Project's Python constants."""
 
 ROW_COLORS_CLASSES = ["first-row", "second-row", "third-row", "fourth-row"]
+
+CROP_W = 120  # width of the rescaled crops while labeling
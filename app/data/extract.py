@@ -1,22 +1,67 @@
 """Code for the extract data phase."""
 
+import os
 import pandas as pd
+from typing import Callable, Iterator, Optional
 
 from dbdie_classes.options.MODEL_TYPE import TO_ID_NAMES as MT_TO_ID_NAMES
 from dbdie_classes.options.SQL_COLS import MANUALLY_CHECKED_COLS
 
-from api import getr, postr
-from paths import IMG_REF_RP
+from api import getr, paginate, postr
+from data.store import StoreWriter, TableName
 
 
-def get_matches_and_labels() -> tuple[list[dict], list[dict]]:
-    """Get matches and labels from the API."""
+def get_matches_and_labels(
+    modified_since: Optional[str] = None,
+) -> tuple[Iterator[list[dict]], Iterator[list[dict]]]:
+    """Get matches and labels from the API, as iterators of pages.
+    If 'modified_since' is set, only the ones modified since then are requested.
+    """
+    params = {} if modified_since is None else {"modified_since": modified_since}
     return (
-        getr("/matches", params={"limit": 3_000}),
-        postr("/labels/filter-many", params={"limit": 30_000}),
+        paginate(
+            getr,
+            "/matches",
+            int(os.environ.get("MATCHES_PAGE_SIZE", 1_000)),
+            key=lambda m: m["id"],
+            order_by="id",
+            params=params,
+        ),
+        paginate(
+            postr,
+            "/labels/filter-many",
+            int(os.environ.get("LABELS_PAGE_SIZE", 5_000)),
+            key=lambda lbl: (lbl["match_id"], lbl["player"]["id"]),
+            order_by="match_id,player_id",
+            params=params,
+        ),
     )
 
 
+class Watermark:
+    """Latest modification date of the records fetched from the API.
+    It's None if any record didn't report its modification date.
+    """
+
+    def __init__(self, start: Optional[str] = None) -> None:
+        self.value = start
+        self.reported = True
+
+    def track(self, pages: Iterator[list[dict]]) -> Iterator[list[dict]]:
+        """Pass the pages through while updating the watermark."""
+        for page in pages:
+            for record in page:
+                date = record.get("date_modified")
+                if date is None:
+                    self.reported = False
+                elif (self.value is None) or (date > self.value):
+                    self.value = date
+            yield page
+
+    def get(self) -> Optional[str]:
+        return self.value if self.reported else None
+
+
 def process_matches(matches_json: list[dict]) -> pd.DataFrame:
     """Process matches' JSON and convert to DataFrame."""
     matches = pd.DataFrame(
@@ -33,36 +78,59 @@ def process_matches(matches_json: list[dict]) -> pd.DataFrame:
     return matches
 
 
-def process_labels(labels_json: list[dict]) -> pd.DataFrame:
-    """Process labels' JSON and convert to DataFrame."""
-    labels = pd.DataFrame(
-        [
-            {k: v for k, v in lbl.items() if k in ["match_id", "player", "manual_checks"]}
-            for lbl in labels_json
-        ]
+def get_labels_columns() -> tuple[list[str], list[tuple[str, int]]]:
+    """Get the model types stored as a single id, and the ones stored as lists
+    along with their lengths.
+    """
+    list_mts = [("perks", 4), ("addons", 2)]
+    single_mts = [mt for mt in MT_TO_ID_NAMES if mt not in dict(list_mts)]
+    return single_mts, list_mts
+
+
+def fit_ids(ids: Optional[list], n: int) -> list:
+    """Fit a list of ids to exactly 'n' values, so that the columns that follow don't shift.
+    Missing values are None and extra ones are dropped.
+    """
+    ids = [] if ids is None else ids
+    return (list(ids) + [None] * n)[:n]
+
+
+def flatten_label(
+    lbl: dict,
+    single_mts: list[str],
+    list_mts: list[tuple[str, int]],
+) -> tuple:
+    """Flatten a label's JSON into a row of the labels table."""
+    checks = lbl["manual_checks"]["predictables"]
+    player = lbl["player"]
+    lists = [fit_ids(player[MT_TO_ID_NAMES[mt]], n) for mt, n in list_mts]
+    return (
+        lbl["match_id"],
+        player["id"],
+        *(checks.get(c[:-5]) for c in MANUALLY_CHECKED_COLS),
+        *(player[MT_TO_ID_NAMES[mt]] for mt in single_mts),
+        *(v for vs in lists for v in vs),
     )
-    assert not labels.empty
-
-    labels["manual_checks"] = labels["manual_checks"].map(lambda v: v["predictables"])
-    for c in MANUALLY_CHECKED_COLS:
-        labels[c] = labels["manual_checks"].map(lambda v: v[c[:-5]])
-    labels = labels.drop("manual_checks", axis=1)
-    
-    labels[MANUALLY_CHECKED_COLS] = labels[MANUALLY_CHECKED_COLS].fillna(False)
 
-    # Extract info from player
-    labels["player_id"] = labels["player"].map(lambda pl: pl["id"])
-    for mt, id_name in MT_TO_ID_NAMES.items():
-        labels[mt] = labels["player"].map(lambda pl: pl[id_name])
-    labels = labels.drop("player", axis=1)
 
-    for i in range(4):
-        labels[f"perks_{i}"] = labels["perks"].map(lambda ps: ps[i] if ps is not None else None)
-    labels = labels.drop("perks", axis=1)
+def process_labels(labels_json: list[dict]) -> pd.DataFrame:
+    """Process labels' JSON and convert to DataFrame.
+    The nested JSON is flattened into rows in a single pass.
+    """
+    assert labels_json
+
+    single_mts, list_mts = get_labels_columns()
+    labels = pd.DataFrame.from_records(
+        [flatten_label(lbl, single_mts, list_mts) for lbl in labels_json],
+        columns=(
+            ["match_id", "player_id"]
+            + list(MANUALLY_CHECKED_COLS)
+            + single_mts
+            + [f"{mt}_{i}" for mt, n in list_mts for i in range(n)]
+        ),
+    )
 
-    for i in range(2):
-        labels[f"addons_{i}"] = labels["addons"].map(lambda ps: ps[i] if ps is not None else None)
-    labels = labels.drop("addons", axis=1)
+    labels[MANUALLY_CHECKED_COLS] = labels[MANUALLY_CHECKED_COLS].fillna(False).astype(bool)
 
     labels = labels.sort_values(["match_id", "player_id"])
     labels = labels.set_index(["match_id", "player_id"], drop=True)
@@ -76,23 +144,47 @@ def split_killer_surv(labels: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]
     return labels[mask], labels[~mask]
 
 
+def write_chunks(
+    pages: Iterator[list[dict]],
+    process_f: Callable[[list[dict]], pd.DataFrame],
+    name: TableName,
+) -> int:
+    """Process each page and append it to the stored table. Return the number of rows."""
+    with StoreWriter(name) as writer:
+        for page in pages:
+            writer.write(process_f(page))
+        writer.commit()
+    return writer.rows
+
+
 # * Main function
 
 
-def extract_from_api() -> None:
-    """Extract data from DBDIE API."""
+def extract_from_api() -> Optional[str]:
+    """Extract data from DBDIE API.
+    Matches and labels are fetched page by page and each page is processed and
+    appended to its stored table, so memory use doesn't grow with the dataset size.
+    Returns the watermark of the extracted data (see 'Watermark').
+    """
     print("Getting data... ", end="")
 
     try:
-        matches_json, labels_json = get_matches_and_labels()
-
-        matches = process_matches(matches_json)
-        labels = process_labels(labels_json)
-
-        matches.to_csv(f"{IMG_REF_RP}/matches.csv", index=True)
-        labels.to_csv(f"{IMG_REF_RP}/labels.csv", index=True)
+        matches_pages, labels_pages = get_matches_and_labels()
+        watermark = Watermark()
+
+        write_chunks(
+            watermark.track(matches_pages),
+            process_matches,
+            "matches",
+        )
+        write_chunks(
+            watermark.track(labels_pages),
+            process_labels,
+            "labels",
+        )
     except Exception:
         print()
         raise
 
     print("✅")
+    return watermark.get()
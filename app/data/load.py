@@ -1,9 +1,8 @@
 """Data related functions."""
 
-import pandas as pd
 from typing import TYPE_CHECKING
 
-from paths import IMG_REF_RP
+from data.store import read_table
 
 if TYPE_CHECKING:
     from classes.base import LabelsDataFrame, MatchesDataFrame
@@ -12,11 +11,5 @@ if TYPE_CHECKING:
 
 
 def load_from_files() -> tuple["MatchesDataFrame", "LabelsDataFrame"]:
-    data = {
-        "matches": pd.read_csv(f"{IMG_REF_RP}/matches.csv"),
-        "labels": pd.read_csv(f"{IMG_REF_RP}/labels.csv"),
-    }
-    return (
-        data["matches"].set_index("id", drop=True),
-        data["labels"].set_index(["match_id", "player_id"], drop=True),
-    )
+    """Load matches and labels from the typed store, sorted by their index."""
+    return read_table("matches"), read_table("labels")
@@ -0,0 +1,146 @@
+"""Code for the typed on-disk store of matches and labels.
+
+Each table is stored as a Feather (Arrow IPC) file, which keeps the dtypes and
+the index, along with a CSV export for humans.
+"""
+
+from dbdie_classes.options.MODEL_TYPE import ALL_MULTIPLE_CHOICE as ALL_MT_MULT
+from dbdie_classes.options.SQL_COLS import MANUALLY_CHECKED_COLS, MT_TO_COLS
+import os
+import pandas as pd
+import pyarrow as pa
+from pyarrow import ipc
+from typing import TYPE_CHECKING, Literal, Optional
+
+from paths import get_img_ref_path
+
+if TYPE_CHECKING:
+    from dbdie_classes.base import Path
+
+TableName = Literal["matches", "labels"]
+
+
+INDEX_DTYPES: dict[TableName, dict[str, str]] = {
+    "matches": {"id": "int32"},
+    "labels": {"match_id": "int32", "player_id": "int8"},
+}
+PREDICTABLE_COLS = {c for mt in ALL_MT_MULT for c in MT_TO_COLS[mt]}
+
+
+def get_dtypes(name: TableName, columns: list[str]) -> dict[str, str]:
+    """Get the compact dtypes of the table's columns.
+    Predictable ids are nullable 16-bit integers and other ids and values are
+    nullable 32-bit ones. Manual-check flags are non-nullable booleans.
+    """
+    if name == "matches":
+        return {"dbdv_id": "Int16"}
+    else:
+        return {
+            c: (
+                "bool" if c in MANUALLY_CHECKED_COLS
+                else "Int16" if c in PREDICTABLE_COLS
+                else "Int32"
+            )
+            for c in columns
+        }
+
+
+def enforce_dtypes(df: pd.DataFrame, name: TableName) -> pd.DataFrame:
+    """Cast the table and its index to their compact dtypes, sorting it by its index."""
+    index_cols = list(df.index.names)
+    df = df.reset_index(drop=False)
+
+    dtypes = INDEX_DTYPES[name] | get_dtypes(name, df.columns.to_list())
+    df = df.astype({c: dt for c, dt in dtypes.items() if c in df.columns})
+
+    return df.set_index(index_cols, drop=True).sort_index()
+
+
+def get_schema(df: pd.DataFrame) -> pa.Schema:
+    """Get the Arrow schema of a table with its compact dtypes, index included.
+    Text columns are always strings, so that it doesn't depend on the values of a chunk,
+    e.g. a chunk whose text column is all null.
+    """
+    dtypes = df.reset_index(drop=False).dtypes
+    return pa.schema(
+        [
+            (
+                c,
+                pa.string()
+                if pd.api.types.is_object_dtype(dt) or pd.api.types.is_string_dtype(dt)
+                else pa.from_numpy_dtype(getattr(dt, "numpy_dtype", dt)),
+            )
+            for c, dt in dtypes.items()
+        ]
+    )
+
+
+class StoreWriter:
+    """Writer of a table of the store, chunk by chunk.
+    Files are written to temporary paths and only replace the stored ones on 'commit',
+    so a failure keeps the previous table.
+    """
+
+    def __init__(self, name: TableName) -> None:
+        self.name = name
+        self.paths: dict[str, "Path"] = {
+            ext: get_img_ref_path(name, ext) for ext in ["feather", "csv"]
+        }
+        self.rows = 0
+        self._schema: Optional[pa.Schema] = None  # set by the first chunk
+        self._writer: Optional[ipc.RecordBatchFileWriter] = None
+
+    def __enter__(self) -> "StoreWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._close()
+        for path in self.paths.values():
+            if os.path.exists(f"{path}.tmp"):
+                os.remove(f"{path}.tmp")
+
+    def write(self, df: pd.DataFrame) -> None:
+        """Append a chunk of the table, cast to the table's schema."""
+        df = enforce_dtypes(df, self.name)
+        if self._schema is None:
+            self._schema = get_schema(df)
+        table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=True)
+        if self._writer is None:
+            self._writer = ipc.new_file(f"{self.paths['feather']}.tmp", table.schema)
+        self._writer.write_table(table)
+
+        df.to_csv(
+            f"{self.paths['csv']}.tmp",
+            mode="a" if self.rows else "w",
+            header=not self.rows,
+            index=True,
+        )
+        self.rows += len(df.index)
+
+    def _close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def commit(self) -> None:
+        """Replace the stored table with the written one."""
+        assert self.rows > 0, f"No data was written for the {self.name} table"
+        self._close()
+        for path in self.paths.values():
+            os.replace(f"{path}.tmp", path)
+
+
+def write_table(df: pd.DataFrame, name: TableName) -> None:
+    """Write the whole table to the store."""
+    with StoreWriter(name) as writer:
+        writer.write(df)
+        writer.commit()
+
+
+def read_table(name: TableName) -> pd.DataFrame:
+    """Read the table from the store, with its compact dtypes and sorted index."""
+    return enforce_dtypes(pd.read_feather(get_img_ref_path(name, "feather")), name)
+
+
+def table_exists(name: TableName) -> bool:
+    return os.path.isfile(get_img_ref_path(name, "feather"))
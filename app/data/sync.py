@@ -0,0 +1,180 @@
+"""Code for the incremental sync of matches and labels."""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+import json
+import os
+import pandas as pd
+from time import time
+from typing import TYPE_CHECKING, Callable, Iterator, Optional
+
+from api import getr
+from data.extract import (
+    extract_from_api,
+    get_matches_and_labels,
+    process_labels,
+    process_matches,
+    Watermark,
+)
+from data.store import enforce_dtypes, read_table, table_exists, TableName, write_table
+from paths import SYNC_STATE_PATH
+
+if TYPE_CHECKING:
+    from dbdie_classes.base import Endpoint, Path
+
+IDS_ENDPOINTS: dict[TableName, "Endpoint"] = {
+    "matches": "/matches/ids",
+    "labels": "/labels/ids",
+}
+
+
+@dataclass
+class SyncState:
+    """State of the last sync of matches and labels."""
+
+    watermark   : str  # latest modification date of the synced data
+    full_sync_at: float  # UNIX timestamp of the last full extraction
+
+    @classmethod
+    def load(cls, path: "Path") -> Optional[SyncState]:
+        """Load state from its JSON file. A missing or corrupt file is no state."""
+        try:
+            with open(path) as f:
+                return SyncState(**json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError, TypeError):
+            return None
+
+    def save(self, path: "Path") -> None:
+        """Save state to its JSON file atomically."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(asdict(self), f, indent=2)
+        os.replace(tmp_path, path)
+
+
+def upsert_table(
+    pages: Iterator[list[dict]],
+    process_f: Callable[[list[dict]], pd.DataFrame],
+    name: TableName,
+) -> pd.Index:
+    """Merge the processed pages into the stored table, replacing rows with the same index.
+    A row fetched twice, as offset pagination can repeat rows modified during the sync,
+    is only kept in its last version.
+    Returns the index of the merged table.
+    """
+    new = [process_f(page) for page in pages]
+    df = read_table(name)
+    if not new:
+        return df.index
+
+    new = pd.concat(new, axis=0)
+    new = enforce_dtypes(new[~new.index.duplicated(keep="last")], name)
+    df = pd.concat((df[~df.index.isin(new.index)], new), axis=0).sort_index()
+
+    write_table(df, name)
+    return df.index
+
+
+def get_api_keys(name: TableName) -> set:
+    """Get the keys of all the rows of the API's table."""
+    ids = getr(IDS_ENDPOINTS[name])
+    return set(ids) if name == "matches" else {tuple(key) for key in ids}
+
+
+def matches_api(index: pd.Index, name: TableName) -> bool:
+    """Whether the table has the same rows as the API's, so that no deletion was missed."""
+    return set(index.to_list()) == get_api_keys(name)
+
+
+def supports_delta_sync(watermark: str) -> bool:
+    """Check whether the API supports what the incremental sync relies on:
+    filtering the rows by 'modified_since' and listing the ids of each table.
+    """
+    try:
+        probe = getr("/matches", params={"modified_since": watermark, "skip": 0, "limit": 1})
+        if any(m.get("date_modified", "") < watermark for m in probe):
+            return False  # the parameter was ignored
+        for endpoint in IDS_ENDPOINTS.values():
+            getr(endpoint)
+    except Exception:
+        return False
+    return True
+
+
+def full_sync() -> None:
+    watermark = extract_from_api()
+    if (watermark is None) or not supports_delta_sync(watermark):
+        print("[WARNING] The API doesn't support the incremental sync, it's off.")
+        if os.path.exists(SYNC_STATE_PATH):
+            os.remove(SYNC_STATE_PATH)
+    else:
+        SyncState(watermark, full_sync_at=time()).save(SYNC_STATE_PATH)
+
+
+def delta_sync(state: SyncState) -> bool:
+    """Fetch the matches and labels modified since the last sync and merge them.
+    Returns False if the local rows don't match the API's ids afterwards,
+    which means that rows were deleted in the API, or if the modification dates
+    weren't reported, in which case the labels aren't fetched.
+    """
+    print("Syncing data... ", end="")
+
+    try:
+        matches_pages, labels_pages = get_matches_and_labels(modified_since=state.watermark)
+        watermark = Watermark(state.watermark)
+
+        matches_ix = upsert_table(watermark.track(matches_pages), process_matches, "matches")
+        in_sync = watermark.get() is not None  # else the API can't be synced incrementally
+        if in_sync:
+            labels_ix = upsert_table(watermark.track(labels_pages), process_labels, "labels")
+            in_sync = (
+                (watermark.get() is not None)
+                and matches_api(matches_ix, "matches")
+                and matches_api(labels_ix, "labels")
+            )
+    except Exception:
+        print()
+        raise
+
+    print("✅")
+    if not in_sync:
+        return False
+
+    state.watermark = watermark.get()
+    state.save(SYNC_STATE_PATH)
+    return True
+
+
+# * Main function
+
+
+def sync_from_api() -> None:
+    """Sync the local matches and labels with the DBDIE API.
+    Only the rows modified since the last sync's watermark are fetched.
+    A full extraction is done instead if there is no previous sync, which is also
+    the case when the API doesn't support the incremental sync, if rows were
+    deleted in the API, if the incremental sync fails, or every SYNC_FULL_EVERY
+    seconds (default a week), which also picks up changes that a sync could miss
+    while it was running.
+    """
+    state = SyncState.load(SYNC_STATE_PATH)
+    full_every = float(os.environ.get("SYNC_FULL_EVERY", 7 * 24 * 60 * 60))
+
+    if (
+        (state is None)
+        or (time() - state.full_sync_at >= full_every)
+        or not table_exists("matches")
+        or not table_exists("labels")
+    ):
+        full_sync()
+    else:
+        try:
+            in_sync = delta_sync(state)
+        except Exception as e:
+            print(f"[WARNING] Incremental sync failed: {e}")
+            in_sync = False
+
+        if not in_sync:
+            print("Local data is out of sync with the API, extracting all of it.")
+            full_sync()
@@ -0,0 +1,93 @@
+"""Code for the cache warm-up phase."""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dbdie_classes.options.MODEL_TYPE import ALL_MULTIPLE_CHOICE as ALL_MT_MULT
+from dbdie_classes.options.MODEL_TYPE import WITH_TYPES
+import os
+from time import perf_counter
+from typing import Callable
+
+from api import cache_from_endpoint, cache_function, cache_types
+from classes.cache_manifest import CacheManifest
+from data.clean import make_clean_function
+from data.sync import sync_from_api
+from paths import PREDICTABLES_MANIFEST_PATH
+
+WarmUpTask = Callable[[], None]
+
+
+def get_warm_up_tasks(
+    manifest: CacheManifest,
+    local_fallback: bool,
+) -> dict[str, WarmUpTask]:
+    """Get warm-up tasks by name. Each task is an independent API fetch."""
+    tasks: dict[str, WarmUpTask] = {
+        "rarity": lambda: cache_from_endpoint("rarity", manifest, local_fallback)
+    }
+
+    for mt in ALL_MT_MULT:
+        for ifk in [True, False]:
+            tasks[f"{mt} (ifk={ifk})"] = (
+                lambda mt=mt, ifk=ifk: cache_function(
+                    mt,
+                    ifk,
+                    make_clean_function(mt, ifk),
+                    manifest,
+                    local_fallback=local_fallback,
+                    types=False,
+                )
+            )
+        if mt in WITH_TYPES:
+            tasks[f"{mt} types"] = (
+                lambda mt=mt: cache_types(
+                    mt,
+                    make_clean_function(mt, False),
+                    manifest,
+                    local_fallback=local_fallback,
+                )
+            )
+
+    tasks["matches & labels"] = sync_from_api
+    return tasks
+
+
+def timed(task: WarmUpTask) -> float:
+    """Run task and return its elapsed time in seconds."""
+    start = perf_counter()
+    task()
+    return perf_counter() - start
+
+
+def print_timings(timings: dict[str, float], total: float) -> None:
+    """Print warm-up timings, slowest first."""
+    width = max(len(name) for name in timings)
+    for name, secs in sorted(timings.items(), key=lambda kv: kv[1], reverse=True):
+        print(f"  {name:<{width}}  {secs:6.2f}s")
+    print(f"  {'TOTAL (wall)':<{width}}  {total:6.2f}s")
+
+
+# * Main function
+
+
+def warm_up_cache(local_fallback: bool, max_workers: int = 8) -> dict[str, float]:
+    """Fetch predictables, matches and labels concurrently and cache them.
+    Predictables whose cache is still fresh (see 'CacheManifest') aren't fetched,
+    and, if 'local_fallback' is True, a stale cache is used when the API fails.
+    Returns the elapsed time of each task.
+    """
+    print("Warming up cache...")
+    manifest = CacheManifest.load(
+        PREDICTABLES_MANIFEST_PATH,
+        ttl=float(os.environ.get("PREDICTABLES_TTL", 24 * 60 * 60)),
+    )
+    tasks = get_warm_up_tasks(manifest, local_fallback)
+
+    start = perf_counter()
+    timings = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(timed, task): name for name, task in tasks.items()}
+        for fut in as_completed(futures):
+            timings[futures[fut]] = fut.result()  # re-raises the task's exception
+
+    print_timings(timings, perf_counter() - start)
+    return timings
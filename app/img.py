@@ -1,5 +1,6 @@
 """Image transformation functions"""
 
+from functools import lru_cache
 from PIL import Image
 
 
@@ -14,3 +15,11 @@ def rescale_img(path: str | None, base_w: int) -> Image.Image | None:
 
     img = img.resize((base_w, h), Image.Resampling.LANCZOS)
     return img
+
+
+@lru_cache(maxsize=512)
+def rescale_crop(path: str, mtime_ns: int | None, base_w: int) -> Image.Image:
+    """Rescale crop image, caching the result by its path and modification time,
+    so that a regenerated crop is rescaled again.
+    """
+    return rescale_img(path, base_w)
@@ -2,47 +2,103 @@
 
 from dbdie_classes.options.FMT import to_fmt
 from dbdie_classes.options.MODEL_TYPE import ALL_MULTIPLE_CHOICE as ALL_MT_MULT
+from dbdie_classes.paths import absp, CROPS_MAIN_FD_RP
 from dotenv import load_dotenv
+import os
+from typing import Optional
 load_dotenv(".env")
 
-from api import cache_function, cache_from_endpoint  # noqa: E402
+from classes.crop_index import CropIndex  # noqa: E402
+from classes.image_prefetcher import ImagePrefetcher  # noqa: E402
+from classes.label_index import LabelIndex  # noqa: E402
+from classes.label_journal import LabelJournal  # noqa: E402
 from classes.labeler import Labeler  # noqa: E402
 from classes.labeler_selector import LabelerSelector  # noqa: E402
-from data.clean import make_clean_function  # noqa: E402
-from data.extract import extract_from_api  # noqa: E402
+from classes.match_image_cache import MatchImageCache  # noqa: E402
+from classes.options_catalog import OptionsCatalog  # noqa: E402
+from classes.session_registry import SessionRegistry  # noqa: E402
+from classes.upload_queue import UploadQueue  # noqa: E402
+from classes.work_allocator import WorkAllocator  # noqa: E402
+from code.labeler import init_match_arrays  # noqa: E402
 from data.load import load_from_files  # noqa: E402
+from data.warm_up import warm_up_cache  # noqa: E402
+from paths import LABEL_JOURNAL_PATH, MATCH_IMG_RP  # noqa: E402
 from ui import create_ui  # noqa: E402
 
 with open("app/styles.css") as f:
     CSS = f.read()
 
 
-def main() -> None:
-    cache_from_endpoint("rarity")
-
-    for mt in ALL_MT_MULT:
-        for ifk in [True, False]:
-            cache_function(
-                mt,
-                ifk,
-                make_clean_function(mt, ifk),
-                local_fallback=False,
+def report_missing_crops(labelers: dict[str, Labeler]) -> None:
+    """Report up front the pending matches whose crops are missing."""
+    for fmt, lbl in labelers.items():
+        missing = lbl.missing_crops()
+        if missing:
+            print(
+                f"[WARNING] {fmt}: {len(missing)} pending matches with missing crops "
+                f"in '{lbl.folder_path}', e.g. match ids {missing[:5]}"
             )
 
-    extract_from_api()
+
+def main() -> None:
+    # Replay the uploads left by the last session before extracting the labels
+    upload_queue = UploadQueue(journal=LabelJournal.load(LABEL_JOURNAL_PATH))
+    replayed = upload_queue.replay()
+    if replayed:
+        upload_queue.join()
+        failed = len(upload_queue.pop_errors())
+        print(f"Replayed {replayed - failed}/{replayed} journaled label uploads.")
+
+    warm_up_cache(local_fallback=True)
     matches, labels = load_from_files()
+    label_index = LabelIndex(labels)
+    allocator = WorkAllocator(
+        label_index,
+        ttl=float(os.environ.get("LABELING_LEASE_TTL", 15 * 60)),
+    )
+
+    catalog = OptionsCatalog()
+
+    # Read-only data shared by the labelers of all sessions
+    fmts = [to_fmt(mt, ifk) for mt in ALL_MT_MULT for ifk in [False, True]]
+    match_lookup = init_match_arrays(matches)
+    crops = {fmt: CropIndex(absp(f"{CROPS_MAIN_FD_RP}/{fmt}")) for fmt in fmts}
+
+    def make_selector(session_id: Optional[str]) -> LabelerSelector:
+        """Make the labeling state of a session, or the full preview one if it's None."""
+        return LabelerSelector(
+            {
+                fmt: Labeler(
+                    matches,
+                    label_index,
+                    fmt=fmt,
+                    allocator=allocator if session_id is not None else None,
+                    owner=session_id,
+                    crops=crops[fmt],
+                    match_lookup=match_lookup,
+                )
+                for fmt in fmts
+            },
+            catalog,
+        )
 
-    labelers = {
-        to_fmt(mt, ifk): Labeler(matches, labels, fmt=to_fmt(mt, ifk))
-        for mt in ALL_MT_MULT
-        for ifk in [False, True]
-    }
-    labeler_sel = LabelerSelector(labelers)
+    sessions = SessionRegistry(make_selector)
+    labeler_sel = make_selector(None)  # for the initial layout, it doesn't lease rows
+    catalog.warm_up(labeler_sel.labelers.values())
+    report_missing_crops(labeler_sel.labelers)
+    img_cache = MatchImageCache.load(
+        MATCH_IMG_RP,
+        max_bytes=int(os.environ.get("MATCH_IMG_CACHE_MB", 512)) * 1024 * 1024,
+        ttl=float(os.environ.get("MATCH_IMG_TTL", 7 * 24 * 60 * 60)),
+    )
+    img_prefetcher = ImagePrefetcher(fetch=img_cache.get)
+    img_prefetcher.prefetch(labeler_sel.labeler)
 
     with open("app/ascii_art.txt") as f:
         print(f.read())
 
-    ui = create_ui(CSS, labeler_sel)
+    ui = create_ui(CSS, labeler_sel, sessions, upload_queue, img_prefetcher)
+    labeler_sel.close()
     ui.launch()
 
 
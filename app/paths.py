@@ -1,15 +1,24 @@
 """Special paths related to DBDIE UI repo folder."""
 
-import pandas as pd
+import os
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from dbdie_classes.base import FullModelType, ModelType, Path
+    from dbdie_classes.base import Path
 
-CACHE_RP = "app/cache"
+CACHE_RP = os.environ.get("DBDIE_UI_CACHE_RP", "app/cache")
 
 IMG_REF_RP = f"{CACHE_RP}/img_ref"
+SYNC_STATE_PATH = f"{IMG_REF_RP}/sync.json"
+MATCH_IMG_RP = f"{CACHE_RP}/match_img"
+LABEL_JOURNAL_PATH = f"{CACHE_RP}/journal/labels.jsonl"
 PREDICTABLES_RP = f"{CACHE_RP}/predictables"
+PREDICTABLES_MANIFEST_PATH = f"{PREDICTABLES_RP}/manifest.json"
+
+
+def get_img_ref_path(name: str, ext: str) -> "Path":
+    """Get path of a cached matches or labels table file."""
+    return f"{IMG_REF_RP}/{name}.{ext}"
 
 
 def get_predictable_csv_path(val: str, is_type: bool) -> "Path":
@@ -18,20 +27,3 @@ def get_predictable_csv_path(val: str, is_type: bool) -> "Path":
         if is_type
         else f"{PREDICTABLES_RP}/{val}.csv"
     )
-
-
-def load_predictable_csv(
-    fmt: "FullModelType",
-    usecols: list[str],
-) -> tuple[pd.DataFrame, "Path"]:
-    path = get_predictable_csv_path(fmt, is_type=False)
-    return pd.read_csv(path, usecols=usecols), path
-
-
-def load_types_csv(
-    mt: "ModelType",
-    usecols: list[str],
-) -> tuple[pd.DataFrame, "Path"]:
-    """Load cached item types CSV."""
-    path = get_predictable_csv_path(mt, is_type=True)
-    return pd.read_csv(path, usecols=usecols), path
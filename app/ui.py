@@ -18,14 +18,23 @@ from components.quick_labeling import (
 from constants import ROW_COLORS_CLASSES
 
 if TYPE_CHECKING:
+    from classes.image_prefetcher import ImagePrefetcher
     from classes.labeler_selector import LabelerSelector
+    from classes.session_registry import SessionRegistry
+    from classes.upload_queue import UploadQueue
 
 
 def create_ui(
     css: str,
     labeler_sel: "LabelerSelector",
+    sessions: "SessionRegistry",
+    upload_queue: "UploadQueue",
+    img_prefetcher: "ImagePrefetcher",
 ) -> gr.Blocks:
-    """Create the Gradio Blocks-based UI."""
+    """Create the Gradio Blocks-based UI.
+    'labeler_sel' only provides the initial layout, as each session's own state
+    is taken from 'sessions' when its page loads.
+    """
     # Select current labeler
     labeler = labeler_sel.labeler
 
@@ -108,13 +117,16 @@ def create_ui(
             tc_info,
         ]
 
-        label_fn = make_label_fn(labeler_sel, upload=True)
-        prev_fn = make_label_fn(labeler_sel, upload=False, go_back=True)
+        label_fn = make_label_fn(sessions, upload_queue, img_prefetcher, upload=True)
+        prev_fn = make_label_fn(
+            sessions, upload_queue, img_prefetcher, upload=False, go_back=True
+        )
 
         ql_dict["previous_btt"].click(
             prev_fn,
             inputs=flattened_dds + flattened_fmt_dds,
             outputs=flattened_imgs + flattened_dds + other_lbl_related,
+            concurrency_limit=None,  # sessions don't share their labeling state
         )
         ql_dict["all_empty_btt"].click(
             empty_fn,
@@ -125,6 +137,7 @@ def create_ui(
             label_fn,
             inputs=flattened_dds + flattened_fmt_dds,
             outputs=flattened_imgs + flattened_dds + other_lbl_related,
+            concurrency_limit=None,
         )
 
         inf_btt.click(
@@ -133,27 +146,35 @@ def create_ui(
             outputs=inf_ta,
         )
 
-        change_fn = make_label_fn(labeler_sel, upload=False)
+        change_fn = make_label_fn(sessions, upload_queue, img_prefetcher, upload=False)
 
         mt_dd.change(
             change_fn,
             inputs=flattened_dds + flattened_fmt_dds,
             outputs=flattened_imgs + flattened_dds + other_lbl_related,
+            concurrency_limit=None,
         )
         ks_dd.change(
             change_fn,
             inputs=flattened_dds + flattened_fmt_dds,
             outputs=flattened_imgs + flattened_dds + other_lbl_related,
+            concurrency_limit=None,
         )
 
         # * Load actions
 
-        sync_labels_fn = make_label_fn(labeler_sel, upload=False)
+        sync_labels_fn = make_label_fn(sessions, upload_queue, img_prefetcher, upload=False)
 
         ui.load(
             sync_labels_fn,
             inputs=flattened_dds + flattened_fmt_dds,
             outputs=flattened_imgs + flattened_dds + other_lbl_related,
+            concurrency_limit=None,
         )
 
+        def close_session(request: gr.Request) -> None:
+            sessions.close(request.session_hash)
+
+        ui.unload(close_session)
+
     return ui
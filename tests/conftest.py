@@ -0,0 +1,8 @@
+"""Pytest configuration.
+The app's modules are imported as top-level ones, as when running app/main.py.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "app"))
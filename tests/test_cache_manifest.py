@@ -0,0 +1,160 @@
+"""Tests of the predictables' cache manifest and its conditional requests."""
+
+from hashlib import sha256
+import json
+from threading import Thread
+from types import SimpleNamespace
+
+import pytest
+
+import api
+from classes.cache_manifest import CacheManifest
+
+
+@pytest.fixture
+def cached(tmp_path) -> str:
+    path = tmp_path / "perks.csv"
+    path.write_text("id,name\n0,Null perk\n")
+    return str(path)
+
+
+@pytest.fixture
+def manifest(tmp_path) -> CacheManifest:
+    return CacheManifest.load(str(tmp_path / "manifest.json"), ttl=60)
+
+
+def fake_response(status_code: int, content: bytes = b"", etag=None) -> SimpleNamespace:
+    return SimpleNamespace(
+        status_code=status_code,
+        content=content,
+        reason="",
+        headers={} if etag is None else {"ETag": etag},
+    )
+
+
+# * Manifest
+
+
+def test_recorded_file_is_fresh_until_ttl(manifest, cached, monkeypatch):
+    manifest.record(cached, rows=1, sha256="abc", etag=None)
+    assert manifest.is_fresh(cached)
+
+    fetched_at = manifest.get(cached).fetched_at
+    monkeypatch.setattr("classes.cache_manifest.time", lambda: fetched_at + 61)
+    assert not manifest.is_fresh(cached)
+
+
+def test_missing_file_is_not_cached(manifest, cached, tmp_path):
+    manifest.record(cached, rows=1, sha256="abc", etag='"v1"')
+    (tmp_path / "perks.csv").unlink()
+
+    assert manifest.get(cached) is None
+    assert not manifest.is_fresh(cached)
+    assert manifest.conditional_headers(cached) == {}
+
+
+def test_conditional_headers_send_etag(manifest, cached):
+    assert manifest.conditional_headers(cached) == {}
+
+    manifest.record(cached, rows=1, sha256="abc", etag=None)
+    assert manifest.conditional_headers(cached) == {}
+
+    manifest.record(cached, rows=1, sha256="abc", etag='"v1"')
+    assert manifest.conditional_headers(cached) == {"If-None-Match": '"v1"'}
+
+
+def test_saved_manifest_is_loaded_back(manifest, cached):
+    manifest.record(cached, rows=1, sha256="abc", etag='"v1"')
+
+    loaded = CacheManifest.load(manifest.path, ttl=60)
+    assert loaded.entries == manifest.entries
+
+
+def test_corrupt_manifest_is_empty(tmp_path):
+    path = tmp_path / "manifest.json"
+    path.write_text("{not json")
+    assert CacheManifest.load(str(path), ttl=60).entries == {}
+
+
+def test_concurrent_records_are_all_saved(manifest, tmp_path):
+    paths = []
+    for i in range(8):
+        path = tmp_path / f"{i}.csv"
+        path.write_text("")
+        paths.append(str(path))
+
+    def record_many(path: str) -> None:
+        for _ in range(20):
+            manifest.record(path, rows=0, sha256="abc", etag=None)
+
+    threads = [Thread(target=record_many, args=(path,)) for path in paths]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    with open(manifest.path) as f:
+        assert sorted(json.load(f)) == sorted(paths)
+
+
+# * Conditional requests
+
+
+def test_fresh_file_isnt_requested(manifest, cached, monkeypatch):
+    manifest.record(cached, rows=1, sha256="abc", etag='"v1"')
+    monkeypatch.setattr(api, "request", lambda *args, **kwargs: pytest.fail("requested"))
+
+    assert api.fetch_cached("/perks", cached, manifest, local_fallback=False) is None
+
+
+def test_not_modified_file_is_revalidated(manifest, cached, monkeypatch):
+    manifest.record(cached, rows=1, sha256="abc", etag='"v1"')
+    manifest.entries[cached].fetched_at = 0.0  # stale
+
+    sent = {}
+
+    def request(method, endpoint, headers, **kwargs):
+        sent.update(headers)
+        return fake_response(304, etag='"v1"')
+
+    monkeypatch.setattr(api, "request", request)
+
+    assert api.fetch_cached("/perks", cached, manifest, local_fallback=False) is None
+    assert sent == {"If-None-Match": '"v1"'}
+    assert manifest.is_fresh(cached)
+
+
+def test_same_content_is_revalidated(manifest, cached, monkeypatch):
+    content = b'[{"id": 0}]'
+    manifest.record(cached, rows=1, sha256=sha256(content).hexdigest(), etag=None)
+    manifest.entries[cached].fetched_at = 0.0
+
+    monkeypatch.setattr(api, "request", lambda *args, **kwargs: fake_response(200, content))
+
+    assert api.fetch_cached("/perks", cached, manifest, local_fallback=False) is None
+    assert manifest.is_fresh(cached)
+
+
+def test_changed_content_is_returned(manifest, cached, monkeypatch):
+    manifest.record(cached, rows=1, sha256="abc", etag='"v1"')
+    manifest.entries[cached].fetched_at = 0.0
+
+    resp = fake_response(200, b'[{"id": 1}]', etag='"v2"')
+    monkeypatch.setattr(api, "request", lambda *args, **kwargs: resp)
+
+    assert api.fetch_cached("/perks", cached, manifest, local_fallback=False) is resp
+    assert not manifest.is_fresh(cached)
+
+
+def test_api_failure_falls_back_to_cached_file(manifest, cached, monkeypatch):
+    manifest.record(cached, rows=1, sha256="abc", etag=None)
+    manifest.entries[cached].fetched_at = 0.0
+
+    def request(*args, **kwargs):
+        raise ConnectionError("API down")
+
+    monkeypatch.setattr(api, "request", request)
+
+    assert api.fetch_cached("/perks", cached, manifest, local_fallback=True) is None
+    with pytest.raises(ConnectionError):
+        api.fetch_cached("/perks", cached, manifest, local_fallback=False)
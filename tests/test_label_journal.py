@@ -0,0 +1,118 @@
+"""Tests of the label uploads' journal and their replay."""
+
+import json
+
+import pytest
+
+from classes.label_journal import LabelJournal
+from classes.label_upload import LabelUpload
+from classes.upload_queue import UploadQueue
+
+
+def make_upload(match_id: int, player_id: int = 0, labels=(1, 2, 3, 4)) -> LabelUpload:
+    return LabelUpload(match_id, player_id, id_name="perk_ids", labels=labels)
+
+
+@pytest.fixture
+def path(tmp_path) -> str:
+    return str(tmp_path / "labels.jsonl")
+
+
+def test_appended_uploads_are_pending_in_order(path):
+    journal = LabelJournal.load(path)
+    journaled = journal.append([make_upload(1), make_upload(2)])
+    journaled += journal.append([make_upload(3, labels=5)])
+
+    assert [seq for seq, _ in journaled] == [1, 2, 3]
+    assert journal.pending() == journaled
+
+
+def test_acked_uploads_arent_pending(path):
+    journal = LabelJournal.load(path)
+    (seq1, _), (_, upl2) = journal.append([make_upload(1), make_upload(2)])
+    journal.ack(seq1)
+
+    assert [upl for _, upl in journal.pending()] == [upl2]
+
+
+def test_pending_uploads_survive_a_restart(path):
+    journal = LabelJournal.load(path)
+    (seq1, _), (seq2, upl2) = journal.append([make_upload(1), make_upload(2)])
+    journal.ack(seq1)
+
+    reloaded = LabelJournal.load(path)
+    assert reloaded.pending() == [(seq2, upl2)]
+    assert reloaded.append([make_upload(3)])[0][0] == seq2 + 1  # sequence goes on
+
+
+def test_only_latest_upload_of_a_key_is_pending(path):
+    journal = LabelJournal.load(path)
+    journal.append([make_upload(1, labels=(1, 2, 3, 4))])
+    (seq, latest), = journal.append([make_upload(1, labels=(5, 6, 7, 8))])
+
+    assert journal.pending() == [(seq, latest)]
+
+    journal.ack(seq)  # settles the older one too
+    assert journal.pending() == []
+    assert LabelJournal.load(path).pending() == []
+
+
+def test_load_compacts_to_pending_uploads(path):
+    journal = LabelJournal.load(path)
+    journaled = journal.append([make_upload(i) for i in range(5)])
+    for seq, _ in journaled[:4]:
+        journal.ack(seq)
+
+    LabelJournal.load(path)
+    with open(path) as f:
+        records = [json.loads(line) for line in f]
+    assert [r["seq"] for r in records] == [journaled[4][0]]
+
+
+def test_torn_last_line_is_ignored(path):
+    journal = LabelJournal.load(path)
+    journaled = journal.append([make_upload(1)])
+    with open(path, "a") as f:
+        f.write('{"seq": 2, "upload": {"match_id"')
+
+    assert LabelJournal.load(path).pending() == journaled
+
+
+def test_replay_uploads_and_acks_pending_uploads(path, monkeypatch):
+    journal = LabelJournal.load(path)
+    journal.append([make_upload(i) for i in range(5)])
+
+    uploaded = []
+    monkeypatch.setattr("classes.upload_queue.put_label", uploaded.append)
+
+    queue = UploadQueue(journal=LabelJournal.load(path))
+    try:
+        assert queue.replay(batch_size=2) == 5
+        queue.join()
+    finally:
+        queue.close()
+
+    assert sorted(upl.match_id for upl in uploaded) == list(range(5))
+    assert queue.pop_errors() == []
+    assert LabelJournal.load(path).pending() == []
+
+
+def test_failed_replayed_uploads_stay_pending(path, monkeypatch):
+    journal = LabelJournal.load(path)
+    journal.append([make_upload(1), make_upload(2)])
+
+    def put_label(upload: LabelUpload) -> None:
+        if upload.match_id == 2:
+            raise ConnectionError("API down")
+
+    monkeypatch.setattr("classes.upload_queue.put_label", put_label)
+
+    queue = UploadQueue(journal=LabelJournal.load(path))
+    try:
+        queue.replay()
+        queue.join()
+    finally:
+        queue.close()
+
+    assert len(queue.pop_errors()) == 1
+    assert [upl.match_id for _, upl in LabelJournal.load(path).pending()] == [2]
@@ -0,0 +1,49 @@
+"""Tests of the incremental sync's merge of the fetched rows."""
+
+import pandas as pd
+
+import pytest
+
+from data.extract import process_matches
+from data.store import read_table, write_table
+from data.sync import upsert_table
+
+
+def match(m_id: int, filename: str) -> dict:
+    return {"id": m_id, "filename": filename, "match_date": "2024-01-01", "dbdv_id": 1}
+
+
+@pytest.fixture(autouse=True)
+def store(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(
+        "data.store.get_img_ref_path",
+        lambda name, ext: str(tmp_path / f"{name}.{ext}"),
+    )
+    write_table(process_matches([match(1, "a.jpg"), match(2, "b.jpg"), match(3, "c.jpg")]), "matches")
+
+
+def test_upsert_replaces_and_appends_rows():
+    pages = iter([[match(2, "b2.jpg"), match(4, "d.jpg")]])
+    index = upsert_table(pages, process_matches, "matches")
+
+    df = read_table("matches")
+    assert index.to_list() == [1, 2, 3, 4]
+    assert df["filename"].to_list() == ["a.jpg", "b2.jpg", "c.jpg", "d.jpg"]
+
+
+def test_upsert_keeps_last_version_of_repeated_rows():
+    pages = iter([[match(4, "d.jpg")], [match(2, "b2.jpg"), match(4, "d2.jpg")]])
+    index = upsert_table(pages, process_matches, "matches")
+
+    df = read_table("matches")
+    assert not df.index.duplicated().any()
+    assert index.to_list() == [1, 2, 3, 4]
+    assert df.loc[4, "filename"] == "d2.jpg"
+
+
+def test_upsert_without_pages_keeps_table():
+    before = read_table("matches")
+    index = upsert_table(iter([]), process_matches, "matches")
+
+    assert index.to_list() == [1, 2, 3]
+    pd.testing.assert_frame_equal(read_table("matches"), before)
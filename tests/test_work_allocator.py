@@ -0,0 +1,139 @@
+"""Tests of the allocation of pending rows among labeling sessions."""
+
+from dbdie_classes.options import MODEL_TYPE as MT
+from dbdie_classes.options.FMT import to_fmt
+import numpy as np
+
+import pytest
+
+from classes.labeler import Labeler
+from classes.labels_counter import LabelsCounter
+from classes.work_allocator import WorkAllocator
+
+FMT = to_fmt(MT.PERKS, False)
+N_PLAYERS = 4
+
+
+class FakeLabelIndex:
+    """Label index whose pending rows are the first 'n_pending' ones."""
+
+    def __init__(self, n_pending: int) -> None:
+        self.n_pending = n_pending
+
+    def pending(self, mt, ifk) -> np.ndarray:
+        return np.arange(self.n_pending)
+
+
+@pytest.fixture
+def allocator() -> WorkAllocator:
+    return WorkAllocator(FakeLabelIndex(42), chunk_windows=2)  # 5 chunks of 8 rows
+
+
+def make_labeler(allocator: WorkAllocator, owner: str = "session") -> Labeler:
+    """Labeler with only the state that its lease bookkeeping uses."""
+    lbl = Labeler.__new__(Labeler)
+    lbl.fmt = FMT
+    lbl.allocator = allocator
+    lbl.owner = owner
+    lbl.counts = LabelsCounter(completed=0, pending=42, n_players=N_PLAYERS, n_items=1)
+    lbl.pending = np.arange(0)
+    lbl.leases = []
+    lbl.uploaded = 0
+    lbl.uploaded_windows = set()
+    return lbl
+
+
+def move(lbl: Labeler, go_back: bool = False) -> None:
+    """Move to the next or previous window, as 'Labeler.next' does."""
+    lbl.sync_leases()
+    lbl.counts.update(go_back)
+
+
+# * Allocator
+
+
+def test_leases_whole_windows_lowest_first(allocator):
+    leases = [allocator.lease(FMT, N_PLAYERS, "a") for _ in range(5)]
+
+    assert [ls.rows.tolist() for ls in leases] == [
+        list(range(i, i + 8)) for i in range(0, 40, 8)
+    ]
+    assert allocator.lease(FMT, N_PLAYERS, "a") is None  # rows 40-41 don't fill a window
+
+
+def test_fully_labeled_lease_is_finished(allocator):
+    lease = allocator.lease(FMT, N_PLAYERS, "a")
+    allocator.advance(lease, 4)
+    assert allocator.holds(lease)
+
+    allocator.advance(lease, 8)
+    assert not allocator.holds(lease)
+
+    allocator.release("a")
+    assert allocator.lease(FMT, N_PLAYERS, "b").rows[0] == 8
+
+
+def test_release_gives_back_unlabeled_rows_first(allocator):
+    lease = allocator.lease(FMT, N_PLAYERS, "a")
+    allocator.lease(FMT, N_PLAYERS, "b")
+    allocator.advance(lease, 4)
+
+    allocator.release("a")
+    assert not allocator.holds(lease)
+    assert allocator.lease(FMT, N_PLAYERS, "c").rows.tolist() == [4, 5, 6, 7]
+
+
+def test_expired_lease_is_handed_out_again(allocator, monkeypatch):
+    now = 1_000.0
+    monkeypatch.setattr("classes.work_allocator.time", lambda: now)
+    lease = allocator.lease(FMT, N_PLAYERS, "a")
+    allocator.advance(lease, 4)
+
+    now += allocator.ttl / 2
+    allocator.renew("a")
+    now += allocator.ttl / 2
+    assert allocator.lease(FMT, N_PLAYERS, "b").rows[0] == 8  # renewed, still held
+
+    now += allocator.ttl
+    assert allocator.lease(FMT, N_PLAYERS, "b").rows.tolist() == [4, 5, 6, 7]
+    assert not allocator.holds(lease)
+
+
+# * Labeler's leases
+
+
+def test_labeler_leases_ahead_of_its_window(allocator):
+    lbl = make_labeler(allocator)
+    move(lbl)
+
+    assert lbl.pending.size >= (1 + Labeler.LEASE_AHEAD) * N_PLAYERS
+    assert lbl.counts.ptr_min == 0
+
+
+def test_shown_window_isnt_labeled_when_going_back(allocator):
+    lbl = make_labeler(allocator)
+    move(lbl)  # window 0
+    lbl.mark_uploaded()
+    move(lbl)  # window 1, not uploaded
+    move(lbl, go_back=True)  # Previous
+
+    assert lbl.leases[0][1].labeled == N_PLAYERS
+
+    lbl.report_uploaded()
+    allocator.release(lbl.owner)
+    assert allocator.lease(FMT, N_PLAYERS, "other").rows[:N_PLAYERS].tolist() == [4, 5, 6, 7]
+
+
+def test_uploaded_windows_are_labeled_once_contiguous(allocator):
+    lbl = make_labeler(allocator)
+    move(lbl)  # window 0, not uploaded
+    move(lbl)  # window 1
+    lbl.mark_uploaded()
+    lbl.sync_leases()
+    assert lbl.leases[0][1].labeled == 0
+
+    move(lbl, go_back=True)  # window 0
+    lbl.mark_uploaded()
+    lbl.sync_leases()
+    assert lbl.leases[0][1].labeled == 2 * N_PLAYERS
+    assert not allocator.holds(lbl.leases[0][1])  # finished